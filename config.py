@@ -23,3 +23,133 @@ class Emojis:
         NEXT = "<:next:1292104363778769007>"
         PAGES = "<:navigate:1292135085650350161>"
         EXIT = "<:cancel:1292135083804987536>"
+
+
+class Lavalink:
+    # Each node's password can be overridden with LAVALINK_<IDENTIFIER>_PASSWORD.
+    NODES = (
+        {
+            "identifier": "primary",
+            "uri": "http://127.0.0.1:1337",
+            "password": "youshallnotpass",
+        },
+    )
+    RESUME_TIMEOUT = 180
+    STATS_INTERVAL = 30
+    SNAPSHOT_INTERVAL = 30
+
+    # Players are disconnected once nothing has played for IDLE_TIMEOUT,
+    # nobody has been listening for ALONE_TIMEOUT or the track has been
+    # paused for PAUSED_TIMEOUT seconds.
+    IDLE_TIMEOUT = 180
+    ALONE_TIMEOUT = 60
+    PAUSED_TIMEOUT = 60 * 15
+    REAP_INTERVAL = 15
+
+    # Rolling telemetry keeps this many node stats and player updates per
+    # series. Nodes are sampled by the STATS_INTERVAL poll and by the stats
+    # Lavalink pushes every minute, about three times a minute, so the node
+    # series covers the last two hours.
+    NODE_SERIES_SIZE = 360
+    PLAYER_SERIES_SIZE = 60
+
+    # New players are refused while the best node is above these limits,
+    # the deficit being the frames per minute a player failed to send.
+    ADMISSION_CPU = 0.9
+    ADMISSION_DEFICIT = 300
+
+    SEARCH_CACHE_SIZE = 4096
+    SEARCH_CACHE_TTL = 60 * 60 * 24 * 3
+
+
+class Media:
+    # The directory and address can be overridden with MEDIA_ROOT and
+    # MEDIA_URL, the latter being how Lavalink reaches the media server.
+    ROOT = ".cache/media"
+    HOST = "127.0.0.1"
+    PORT = 2334
+    BUDGET = 2 * 1024**3
+    MAX_SIZE = 25 * 1024**2
+    ALIASES = 4096
+
+
+class History:
+    # Play events are written with COPY every FLUSH_INTERVAL seconds, or as
+    # soon as BATCH_SIZE of them are buffered.
+    FLUSH_INTERVAL = 15
+    BATCH_SIZE = 500
+    BUFFER_LIMIT = 20000
+    RETENTION_DAYS = 90
+
+    # The most popular searches and titles of the last WARM_WINDOW_DAYS are
+    # loaded into their caches on boot and every night at WARM_HOUR (UTC).
+    WARM_HOUR = 4
+    WARM_WINDOW_DAYS = 7
+    WARM_SEARCHES = 250
+    WARM_TRACKS = 2000
+    WARM_DELAY = 0.5
+
+
+class Speech:
+    # Synthesized phrases kept in memory, every phrase is also kept in the
+    # media store under its disk budget.
+    MEMORY_BUDGET = 16 * 1024**2
+
+    # Engines are tried in order, falling back to the next one when an engine
+    # is unavailable or fails. LANGUAGE_ENGINES overrides the order per
+    # language, e.g. {"en": ("espeak", "google")}.
+    ENGINES = ("google", "espeak")
+    LANGUAGE_ENGINES: dict[str, tuple[str, ...]] = {}
+    ENGINE_TIMEOUT = 10
+
+    # Long text is split at sentence and clause boundaries into chunks of at
+    # most CHUNK_SIZE characters, which are synthesized CONCURRENCY at a time
+    # so playback starts as soon as the first one is ready.
+    CHUNK_SIZE = 120
+    CONCURRENCY = 4
+
+    # Utterances wait in a per-guild queue of at most QUEUE_DEPTH, taking
+    # turns between speakers. Utterances older than UTTERANCE_TTL seconds
+    # are skipped, and the next one is only synthesized once no more than
+    # QUEUE_AHEAD chunks are left to be played.
+    QUEUE_DEPTH = 20
+    QUEUE_AHEAD = 1
+    QUEUE_IDLE = 60
+    UTTERANCE_TTL = 30
+
+    # Guilds can extend the slang dictionary with up to SLANG_LIMIT entries.
+    SLANG_LIMIT = 100
+    SLANG_LENGTH = 100
+
+    # The last SPAM_WINDOW messages of a user within SPAM_TTL seconds are
+    # remembered. Sending the same message SPAM_DUPLICATES times, or one
+    # word SPAM_REPEATS times making up SPAM_SHARE of the window, is spam.
+    SPAM_WINDOW = 6
+    SPAM_TTL = 30
+    SPAM_DUPLICATES = 3
+    SPAM_REPEATS = 10
+    SPAM_SHARE = 0.4
+    SPAM_USERS = 10000
+
+
+class Blacklist:
+    # Imports are read from attachments of up to IMPORT_SIZE bytes.
+    IMPORT_SIZE = 8 * 1024**2
+    REASON_LENGTH = 512
+
+    # Guilds of blacklisted targets are left DEPARTURE_CONCURRENCY at a time,
+    # starting no more than DEPARTURE_RATE a second, and the progress message
+    # is updated every PROGRESS_INTERVAL seconds.
+    DEPARTURE_CONCURRENCY = 8
+    DEPARTURE_RATE = 20
+    DEPARTURE_ATTEMPTS = 3
+    PROGRESS_INTERVAL = 5
+
+
+class Profiling:
+    # Every thread's stack is sampled each INTERVAL seconds, up to MAX_DEPTH
+    # frames deep, for at most MAX_DURATION seconds at a time.
+    INTERVAL = 0.005
+    MAX_DEPTH = 128
+    DURATION = 10
+    MAX_DURATION = 120
@@ -1,14 +1,26 @@
+import asyncio
+from collections import Counter
+from contextlib import suppress
+from io import BytesIO
 from itertools import chain
+from time import monotonic
 from traceback import format_exception
-from typing import Annotated, Optional, cast
-from discord import Embed, Guild, Message, User
+from typing import Annotated, Collection, Optional, Sequence, cast
+from discord import Attachment, Embed, File, Guild, HTTPException, Message, User
 from discord.ext.commands import Cog, command, group
 from discord.utils import as_chunks, format_dt
 from jishaku.modules import ExtensionConverter
 from wavelink import Pool
 from extensions.music.player import Player
-from system.pagination import Paginator
-from system.utils import pluralize
+from extensions.music.player.metadata import clean_title
+from extensions.synthesize.shared.engines import ENGINES, benchmark
+from system.lavalink import LOADS, SERIES, NodeLoad, admits, penalty
+from config import Blacklist, Profiling
+from system.blacklist import Departures, affected_guilds, export_entries, import_entries, parse_entries
+from system.guilds import Sort
+from system.pagination import Pages, Paginator
+from system.profiler import Sampler
+from system.utils import format_size, pluralize
 from wock import Wock, Context
 
 
@@ -55,22 +67,28 @@ class Developer(Cog, command_attrs=dict(hidden=False)):
         return await ctx.send("\n".join(result))
 
     @group(aliases=("servers", "server", "guild"), invoke_without_command=True)
-    async def guilds(self, ctx: Context) -> Message:
-        """View all servers the bot is in."""
+    async def guilds(
+        self,
+        ctx: Context,
+        sort: Optional[Sort] = "players",
+        *,
+        query: Optional[str] = None,
+    ) -> Message:
+        """View or search the servers the bot is in.
 
-        def get_player(guild_id: int) -> Player:
-            return cast(Player, self.bot.node.get_player(guild_id))
+        Servers are matched by name, ID or owner, and sorted by
+        `players`, `members` or `name`.
+        """
 
-        embeds: list[Embed] = []
-        sorted_guilds = sorted(
-            self.bot.guilds,
-            key=lambda guild: get_player(guild.id) is not None,
-            reverse=True,
-        )
-        for guilds in as_chunks(sorted_guilds, 6):
+        guilds = self.bot.guild_index.search(query, sort or "players")
+        if not guilds:
+            return await ctx.warn(f"Couldn't find any servers matching **{query}**")
+
+        def render(guild_ids: Sequence[int], index: int) -> Embed:
             embed = Embed(title="Servers")
-            for guild in guilds:
-                player = get_player(guild.id)
+            embed.set_footer(text=f"{len(self.bot.guild_index):,} servers indexed")
+            for guild in filter(None, map(self.bot.get_guild, guild_ids)):
+                player = cast(Player, guild.voice_client)
                 _id = f"`{guild.id}`"
                 if guild.vanity_url:
                     _id = f"[{_id}]({guild.vanity_url})"
@@ -81,15 +99,16 @@ class Developer(Cog, command_attrs=dict(hidden=False)):
                         [
                             _id,
                             f"Owner: {guild.owner or guild.owner_id}",
+                            f"Members: {guild.member_count or 0:,}",
                             f"Music Session: {'✅' if player else '❌'}",
                             f"Synthesizing Text: {'✅' if player and player.synthesize else '❌'}",
                         ]
                     ),
                 )
 
-            embeds.append(embed)
+            return embed
 
-        return await Paginator(ctx, entries=embeds)
+        return await Paginator(ctx, entries=Pages(guilds, render))
 
     @guilds.command(
         name="view",
@@ -98,10 +117,14 @@ class Developer(Cog, command_attrs=dict(hidden=False)):
             "info",
         ),
     )
-    async def guilds_view(self, ctx: Context, *, guild: Guild) -> Message:
+    async def guilds_view(self, ctx: Context, *, query: str) -> Message:
         """View more information about a server."""
 
-        player = cast(Player, self.bot.node.get_player(guild.id))
+        guild = self.bot.guild_index.find(query)
+        if not guild:
+            return await ctx.warn(f"Couldn't find a server matching **{query}**")
+
+        player = cast(Player, guild.voice_client)
         embed = Embed()
         embed.description = (
             f"{format_dt(guild.created_at)} ({format_dt(guild.created_at, 'R')})"
@@ -159,6 +182,233 @@ class Developer(Cog, command_attrs=dict(hidden=False)):
 
         return await ctx.send(embed=embed)
 
+    @command(aliases=("lavalink",))
+    async def nodes(self, ctx: Context) -> Message:
+        """View the load of every Lavalink node."""
+
+        if not Pool.nodes:
+            return await ctx.warn("There aren't any nodes connected")
+
+        embed = Embed(title="Nodes")
+        for node in Pool.nodes.values():
+            load = LOADS.get(node.identifier) or NodeLoad()
+            value = [
+                f"Status: `{node.status.name.title()}`",
+                f"Players: `{len(node.players):,}` (`{load.playing:,}` playing on node)",
+                f"CPU: `{load.system_load:.1%}` (`{load.lavalink_load:.1%}` Lavalink)",
+                f"Frames: `{load.deficit:,}` deficit, `{load.nulled:,}` nulled",
+                f"Penalty: `{penalty(node):,.2f}`",
+                f"Admitting: {'✅' if admits(node) else '❌'}",
+            ]
+            if series := SERIES.get(node.identifier):
+                value.append(
+                    f"Trend: `{series.mean('system_load'):.1%}` CPU, "
+                    f"`{series.peak('deficit'):,.0f}` peak deficit over `{len(series)}` samples"
+                )
+
+            embed.add_field(
+                name=node.identifier,
+                value="\n".join(value),
+            )
+
+        return await ctx.send(embed=embed)
+
+    @command(aliases=("voice",))
+    async def players(self, ctx: Context) -> Message:
+        """View the resources held by every live player."""
+
+        players = [
+            client for client in self.bot.voice_clients if isinstance(client, Player)
+        ]
+        if not players:
+            return await ctx.warn("There aren't any active players")
+
+        music = self.bot.get_cog("Music")
+        reaped = getattr(music, "reaped", {})
+        slots = Counter(player.node.identifier for player in players)
+        footprints = {player.guild.id: player.footprint() for player in players}
+        summary = "\n".join(
+            [
+                f"Players: `{len(players):,}` using `{format_size(sum(footprints.values()))}`",
+                "Slots: "
+                + ", ".join(f"`{node}` (`{count:,}`)" for node, count in slots.items()),
+                "Reaped: "
+                + (
+                    ", ".join(f"`{count:,}` {reason}" for reason, count in reaped.items())
+                    or "`0`"
+                ),
+            ]
+        )
+
+        now = monotonic()
+        embeds: list[Embed] = []
+        players.sort(key=lambda player: footprints[player.guild.id], reverse=True)
+        for chunk in as_chunks(players, 6):
+            embed = Embed(title="Players", description=summary)
+            for player in chunk:
+                if player.alone_since:
+                    state = f"Alone for `{now - player.alone_since:,.0f}s`"
+                elif player.paused:
+                    state = "Paused"
+                elif player.playing:
+                    state = "Playing"
+                else:
+                    state = "Idle"
+
+                embed.add_field(
+                    name=player.guild.name,
+                    value="\n".join(
+                        [
+                            f"Node: `{player.node.identifier}`",
+                            f"State: {state}",
+                            f"Queue: `{len(player.queue):,}` (`{player.queue.pending:,}` pending)",
+                            f"History: `{len(player.queue.history or ()):,}`",
+                            f"Memory: `{format_size(footprints[player.guild.id])}`",
+                            f"Ping: `{player.telemetry.series.mean('ping'):,.0f}ms` average",
+                            f"Faults: `{player.telemetry.stuck:,}` stuck, `{player.telemetry.exceptions:,}` failed",
+                        ]
+                    ),
+                )
+
+            embeds.append(embed)
+
+        return await Paginator(ctx, entries=embeds)
+
+    @command(name="cache", aliases=("caches",))
+    async def cache_stats(self, ctx: Context) -> Message:
+        """View the hit rates of the search, media, speech and title caches."""
+
+        search = self.bot.search_cache
+        embed = Embed(title="Caches")
+        embed.add_field(
+            name="Search",
+            value="\n".join(
+                [
+                    f"Entries: `{len(search.entries):,}` in memory",
+                    f"Hits: `{search.hits:,}` (`{search.persistent_hits:,}` from database)",
+                    f"Misses: `{search.misses:,}`",
+                    f"Hit Rate: `{search.hit_rate:.1%}`",
+                    f"Saved: `{search.saved:,.1f}s` of loading",
+                ]
+            ),
+        )
+        media = self.bot.media
+        embed.add_field(
+            name="Media",
+            value="\n".join(
+                [
+                    f"Files: `{len(media.entries):,}` using `{format_size(media.size)}`",
+                    f"Hits: `{media.hits:,}`",
+                    f"Misses: `{media.misses:,}`",
+                    f"Evictions: `{media.evictions:,}`",
+                ]
+            ),
+        )
+        if history := getattr(self.bot.get_cog("Music"), "history", None):
+            embed.add_field(
+                name="History",
+                value="\n".join(
+                    [
+                        f"Buffered: `{len(history.buffer):,}` events",
+                        f"Flushed: `{history.flushed:,}` (`{history.dropped:,}` dropped)",
+                        f"Warmed: `{history.warmed:,}` searches",
+                    ]
+                ),
+            )
+
+        if speech := getattr(self.bot.get_cog("Synthesize"), "speech", None):
+            embed.add_field(
+                name="Speech",
+                value="\n".join(
+                    [
+                        f"Entries: `{len(speech.entries):,}` using `{format_size(speech.size)}`",
+                        f"Hits: `{speech.hits:,}` (`{speech.disk_hits:,}` from disk)",
+                        f"Misses: `{speech.misses:,}`",
+                        f"Hit Rate: `{speech.hit_rate:.1%}`",
+                    ]
+                ),
+            )
+
+        titles = clean_title.cache_info()
+        embed.add_field(
+            name="Titles",
+            value="\n".join(
+                [
+                    f"Entries: `{titles.currsize:,}`/`{titles.maxsize:,}`",
+                    f"Hits: `{titles.hits:,}`",
+                    f"Misses: `{titles.misses:,}`",
+                ]
+            ),
+        )
+
+        return await ctx.send(embed=embed)
+
+    @command(aliases=("ttsbench",))
+    async def speechbench(self, ctx: Context, language: str = "en") -> Message:
+        """Compare the latency and throughput of the speech engines."""
+
+        engines = [
+            engine
+            for engine in ENGINES.values()
+            if engine.available() and engine.supports(language)
+        ]
+        if not engines:
+            return await ctx.warn(f"There aren't any speech engines for `{language}`")
+
+        async with ctx.typing():
+            results = [
+                await benchmark(engine, language=language) for engine in engines
+            ]
+
+        embed = Embed(title="Speech Engines")
+        for result in results:
+            embed.add_field(
+                name=result.engine,
+                value="\n".join(
+                    [
+                        f"Latency: `{result.latency * 1000:,.0f}ms` (`{result.p95 * 1000:,.0f}ms` p95)",
+                        f"Throughput: `{result.throughput:,.2f}` phrases/s",
+                        f"Failures: `{result.failures}`/`{result.phrases}`",
+                        f"Audio: `{format_size(result.size)}`",
+                    ]
+                ),
+            )
+
+        return await ctx.send(embed=embed)
+
+    @command(aliases=("prof", "profiler"))
+    async def profile(
+        self,
+        ctx: Context,
+        seconds: int = Profiling.DURATION,
+        top: int = 10,
+    ) -> Message:
+        """Sample the stack of every thread and show where the time goes."""
+
+        seconds = max(1, min(seconds, Profiling.MAX_DURATION))
+        async with ctx.typing():
+            profile = await Sampler().profile(seconds)
+
+        busy = profile.busy or 1
+        hotspots = [
+            f"`{own / busy:>6.1%}` `{total / busy:>6.1%}` {function[:80]}"
+            for function, own, total in profile.hotspots(max(1, min(top, 25)))
+        ]
+        embed = Embed(
+            title="Profile",
+            description="\n".join(hotspots) or "Every thread was idle",
+        )
+        embed.set_footer(
+            text=(
+                f"{profile.samples:,} samples over {profile.elapsed:.1f}s"
+                f" • {profile.idle / (profile.idle + profile.busy or 1):.0%} idle"
+                f" • {profile.overhead / profile.elapsed:.2%} overhead"
+            )
+        )
+
+        buffer = BytesIO(profile.collapsed().encode())
+        return await ctx.send(embed=embed, file=File(buffer, filename="profile.folded"))
+
     @group(aliases=("bl",), invoke_without_command=True)
     async def blacklist(
         self,
@@ -179,16 +429,107 @@ class Developer(Cog, command_attrs=dict(hidden=False)):
         query = "INSERT INTO blacklist (target_id, reason) VALUES ($1, $2)"
         await self.bot.pool.execute(query, target_id, reason)
         async with ctx.typing():
-            if isinstance(target, User):
-                for guild in target.mutual_guilds:
-                    if guild.owner_id == target.id:
-                        await guild.leave()
-
-            elif isinstance(target, Guild):
-                await target.leave()
+            await Departures(affected_guilds(self.bot, {target_id})).run()
 
         return await ctx.warn(f"No longer allowing `{target}` to use the bot")
 
+    async def depart(
+        self,
+        ctx: Context,
+        summary: str,
+        target_ids: Collection[int],
+    ) -> Message:
+        """Leave the guilds of blacklisted targets, reporting the progress."""
+
+        departures = Departures(affected_guilds(self.bot, target_ids))
+        if not departures:
+            return await ctx.approve(summary)
+
+        def progress() -> str:
+            return (
+                f"{summary}\nLeft `{departures.left:,}`/`{len(departures):,}` servers"
+                + (f" (`{departures.failed:,}` failed)" if departures.failed else "")
+            )
+
+        message = await ctx.approve(progress())
+        task = asyncio.create_task(departures.run())
+        while not task.done():
+            await asyncio.wait((task,), timeout=Blacklist.PROGRESS_INTERVAL)
+            with suppress(HTTPException):
+                await message.edit(embed=ctx.create(description=progress())["embed"])
+
+        # Anything the worker didn't handle surfaces through the command.
+        await task
+        return message
+
+    @blacklist.command(name="import", aliases=("bulk",))
+    async def blacklist_import(
+        self,
+        ctx: Context,
+        file: Optional[Attachment] = None,
+    ) -> Message:
+        """Blacklist every ID of an attached file, one per line with a reason."""
+
+        file = file or next(iter(ctx.message.attachments), None)
+        if not file:
+            return await ctx.warn("Attach a file of IDs to blacklist")
+
+        if file.size > Blacklist.IMPORT_SIZE:
+            return await ctx.warn(
+                f"The file can't be larger than {format_size(Blacklist.IMPORT_SIZE)}"
+            )
+
+        text = (await file.read()).decode("utf-8-sig", "replace")
+        entries, invalid = parse_entries(text)
+        if not entries:
+            return await ctx.warn("The file doesn't contain any IDs")
+
+        async with ctx.typing():
+            async with self.bot.pool.acquire() as connection, connection.transaction():
+                added = await import_entries(connection, entries)
+
+        summary = (
+            f"Blacklisted `{len(added):,}` new {pluralize('target', len(added))}"
+            f", `{len(entries) - len(added):,}` already were"
+            + (f" and `{invalid:,}` invalid {pluralize('line', invalid)} skipped" if invalid else "")
+        )
+        return await self.depart(ctx, summary, set(added))
+
+    @blacklist.command(name="export")
+    async def blacklist_export(self, ctx: Context) -> Message:
+        """Export the blacklist as a file which can be imported."""
+
+        async with self.bot.pool.acquire() as connection:
+            buffer = await export_entries(connection)
+
+        return await ctx.send(file=File(buffer, filename="blacklist.csv"))
+
+    @blacklist.command(name="remove")
+    async def blacklist_remove(
+        self,
+        ctx: Context,
+        file: Optional[Attachment] = None,
+    ) -> Message:
+        """Allow every ID of an attached file to use the bot again."""
+
+        file = file or next(iter(ctx.message.attachments), None)
+        if not file:
+            return await ctx.warn("Attach a file of IDs to allow")
+
+        if file.size > Blacklist.IMPORT_SIZE:
+            return await ctx.warn(
+                f"The file can't be larger than {format_size(Blacklist.IMPORT_SIZE)}"
+            )
+
+        text = (await file.read()).decode("utf-8-sig", "replace")
+        entries, _ = parse_entries(text)
+        query = "DELETE FROM blacklist WHERE target_id = ANY($1::BIGINT[])"
+        status = await self.bot.pool.execute(query, [target_id for target_id, _ in entries])
+        removed = int(status.split()[-1])
+        return await ctx.approve(
+            f"Now allowing `{removed:,}` {pluralize('target', removed)} to use the bot"
+        )
+
     @blacklist.command(name="view", aliases=("search", "info"))
     async def blacklist_view(self, ctx: Context, *, target: User | int) -> Message:
         """View the blacklist status of a user or server."""
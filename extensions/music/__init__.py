@@ -1,39 +1,75 @@
+import asyncio
+from collections import Counter
 from contextlib import suppress
+import json
+import logging
 import math
-from typing import Literal, Optional, Union, cast
+from datetime import time, timezone
+from os import environ
+from time import monotonic
+from typing import Any, List, Literal, Optional, Sequence, Tuple, Union, cast
 
 
-from wavelink import QueueMode, TrackEndEventPayload, TrackStartEventPayload
+from asyncpg import Record
+from wavelink import (
+    NodeReadyEventPayload,
+    PlayerUpdateEventPayload,
+    QueueMode,
+    TrackEndEventPayload,
+    TrackExceptionEventPayload,
+    TrackStartEventPayload,
+    TrackStuckEventPayload,
+)
 
-from system.pagination import Paginator
+from system.pagination import Pages, Paginator
 from system.base import Context as BaseContext
 
+from .history import PlayHistory
 from .player import Player, Panel
-from discord import HTTPException, Message, Attachment, VoiceChannel
+from .player.panel import PanelButton
+from .player.queue import Queue, QueuedTrack, is_speech, requester_of
+from .player.session import decode, snapshot
+from discord import (
+    ClientException,
+    Embed,
+    HTTPException,
+    Member,
+    Message,
+    Attachment,
+    VoiceChannel,
+    VoiceState,
+)
 from discord.ext.commands import Cog, hybrid_group, hybrid_command, command
+from discord.ext.tasks import loop
+from discord.utils import as_chunks
 
 from wavelink import (
-    Playable as Track,
     TrackSource,
     Search,
     LavalinkLoadException,
     Playlist,
     Pool,
     Node,
+    NodeStatus,
+    InvalidNodeException,
 )
+from config import History, Lavalink
+from system.lavalink import LavalinkNode, connected_nodes, forget, refresh, select_node
 from system.utils import format_duration, pluralize
 from wock import Wock
 
+log = logging.getLogger(__name__)
+
 
 class Context(BaseContext):
     voice_client: Player
 
-def required_votes(command: str, channel: VoiceChannel):
+def required_votes(command: str, members: int):
     """Method which returns required votes based on amount of members in a channel."""
 
-    required = math.ceil((len(channel.members) - 1) / 2.5)
+    required = math.ceil((members - 1) / 2.5)
     if command == "stop":
-        if len(channel.members) == 3:
+        if members == 3:
             required = 2
 
     return required or 1
@@ -41,17 +77,477 @@ def required_votes(command: str, channel: VoiceChannel):
 class Music(Cog):
     def __init__(self, bot: Wock):
         self.bot = bot
+        self.unhealthy: set[str] = set()
+        self.restored = False
+        self.reaped: Counter[str] = Counter()
+        self.history = PlayHistory(bot)
 
     async def cog_load(self) -> None:
         nodes = [
-            Node(
-                uri=f"http://127.0.0.1:1337",
-                password="youshallnotpass",
-                resume_timeout=180,
+            LavalinkNode(
+                identifier=node["identifier"],
+                uri=node["uri"],
+                password=environ.get(
+                    f"LAVALINK_{node['identifier'].upper()}_PASSWORD",
+                    node["password"],
+                ),
+                resume_timeout=Lavalink.RESUME_TIMEOUT,
             )
+            for node in Lavalink.NODES
+            if node["identifier"] not in Pool.nodes
         ]
 
-        await Pool.connect(nodes=nodes, client=self.bot)
+        if nodes:
+            # Reusing the previous session id lets Lavalink resume the players
+            # it kept alive for `resume_timeout` seconds.
+            records = await self.bot.pool.fetch(
+                "SELECT identifier, session_id FROM lavalink_sessions"
+            )
+            sessions = {record["identifier"]: record["session_id"] for record in records}
+            for node in nodes:
+                node._session_id = sessions.get(node.identifier)
+
+            await Pool.connect(nodes=nodes, client=self.bot)
+
+        await self.bot.search_cache.prune()
+
+        # Panel buttons are routed by their custom id, so panels sent before a
+        # restart keep working without any view being stored per message.
+        self.bot.add_dynamic_items(PanelButton)
+        self.monitor_nodes.start()
+        self.persist_sessions.start()
+        self.reap_players.start()
+        self.flush_history.start()
+        self.warm_caches.start()
+
+    async def cog_unload(self) -> None:
+        self.bot.remove_dynamic_items(PanelButton)
+        self.monitor_nodes.cancel()
+        self.persist_sessions.cancel()
+        self.reap_players.cancel()
+        self.flush_history.cancel()
+        self.warm_caches.cancel()
+        await self.history.close()
+        await self.save_sessions()
+
+    async def save_sessions(self) -> None:
+        """Snapshot every active player so it can be resumed after a restart.
+
+        Connected players with nothing worth resuming, like one which finished
+        its queue, have their previous snapshot removed.
+        """
+
+        rows: List[Tuple[Any, ...]] = []
+        finished: List[int] = []
+        for client in self.bot.voice_clients:
+            if not isinstance(client, Player):
+                continue
+
+            if row := snapshot(client):
+                rows.append(row)
+            elif client.guild:
+                finished.append(client.guild.id)
+
+        if not rows and not finished:
+            return
+
+        query = """
+        INSERT INTO player_sessions (
+            guild_id,
+            channel_id,
+            text_channel_id,
+            message_id,
+            controller_id,
+            node,
+            track,
+            requester_id,
+            position,
+            paused,
+            volume,
+            loop_mode,
+            synthesize,
+            queue
+        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14::JSONB)
+        ON CONFLICT (guild_id)
+        DO UPDATE SET
+            channel_id = EXCLUDED.channel_id,
+            text_channel_id = EXCLUDED.text_channel_id,
+            message_id = EXCLUDED.message_id,
+            controller_id = EXCLUDED.controller_id,
+            node = EXCLUDED.node,
+            track = EXCLUDED.track,
+            requester_id = EXCLUDED.requester_id,
+            position = EXCLUDED.position,
+            paused = EXCLUDED.paused,
+            volume = EXCLUDED.volume,
+            loop_mode = EXCLUDED.loop_mode,
+            synthesize = EXCLUDED.synthesize,
+            queue = EXCLUDED.queue,
+            updated_at = NOW();
+        """
+        async with self.bot.pool.acquire() as connection, connection.transaction():
+            if finished:
+                await connection.execute(
+                    "DELETE FROM player_sessions WHERE guild_id = ANY($1::BIGINT[])",
+                    finished,
+                )
+
+            if rows:
+                await connection.executemany(query, rows)
+
+    @loop(seconds=Lavalink.SNAPSHOT_INTERVAL)
+    async def persist_sessions(self) -> None:
+        await self.save_sessions()
+
+    @persist_sessions.before_loop
+    async def before_persist_sessions(self) -> None:
+        await self.bot.wait_until_ready()
+
+    @Cog.listener()
+    async def on_wavelink_node_ready(self, payload: NodeReadyEventPayload) -> None:
+        query = """
+        INSERT INTO lavalink_sessions (
+            identifier,
+            session_id
+        ) VALUES ($1, $2)
+        ON CONFLICT (identifier)
+        DO UPDATE SET
+            session_id = EXCLUDED.session_id;
+        """
+        await self.bot.pool.execute(query, payload.node.identifier, payload.session_id)
+
+        if not self.restored:
+            self.restored = True
+            asyncio.create_task(self.restore_sessions())
+            asyncio.create_task(self.history.warm())
+
+    async def restore_sessions(self) -> None:
+        """Rejoin the voice channels of the players snapshotted before a restart."""
+
+        await self.bot.wait_until_ready()
+        records = await self.bot.pool.fetch(
+            "DELETE FROM player_sessions RETURNING *"
+        )
+
+        restored = 0
+        for batch in as_chunks(records, 10):
+            results = await asyncio.gather(
+                *(self.restore_session(record) for record in batch),
+                return_exceptions=True,
+            )
+            for record, result in zip(batch, results):
+                if isinstance(result, Exception):
+                    log.warning(
+                        "Failed to restore the player of %s: %s",
+                        record["guild_id"],
+                        result,
+                    )
+                elif result:
+                    restored += 1
+
+        if records:
+            log.info("Restored %s of %s player sessions", restored, len(records))
+
+    async def restore_session(self, record: Record) -> bool:
+        guild = self.bot.get_guild(record["guild_id"])
+        if not guild or guild.voice_client:
+            return False
+
+        channel = guild.get_channel(record["channel_id"])
+        text_channel = guild.get_channel_or_thread(record["text_channel_id"])
+        if not isinstance(channel, VoiceChannel) or not text_channel:
+            return False
+
+        elif not any(not member.bot for member in channel.members):
+            return False
+
+        ctx: Optional[Context] = None
+        for message_id in (record["message_id"], record["controller_id"]):
+            if not message_id:
+                continue
+
+            with suppress(HTTPException):
+                message = await text_channel.fetch_message(message_id)
+                ctx = cast(Context, await self.bot.get_context(message))
+                break
+
+        if not ctx:
+            return False
+
+        node = Pool.nodes.get(record["node"])
+        if not node or node.status is not NodeStatus.CONNECTED:
+            node = select_node()
+
+        async with self.bot.voice.lock(guild.id):
+            if guild.voice_client:
+                return False
+
+            client = await channel.connect(cls=Player(nodes=[node]), self_deaf=True)
+
+        client.context = ctx
+        client.synthesize = record["synthesize"]
+        client.queue.mode = QueueMode[record["loop_mode"]]
+
+        entries: list[list] = json.loads(record["queue"])
+        encoded = [encoded for encoded, _ in entries]
+        if record["track"]:
+            encoded.insert(0, record["track"])
+
+        tracks = await decode(client.node, encoded)
+        track = tracks.pop(0) if record["track"] else None
+        for queued, (_, requester_id) in zip(tracks, entries):
+            queued.extras = {"requester_id": requester_id}
+
+        client.queue.put_lazy(tracks)
+        if record["controller_id"]:
+            with suppress(HTTPException):
+                await text_channel.get_partial_message(record["controller_id"]).delete()
+
+        if not track:
+            if client.queue:
+                await client.play(client.queue.get())
+
+            return True
+
+        position = record["position"]
+        # When the Lavalink session was resumed, the node still knows exactly
+        # where the track is, which is more accurate than the last snapshot.
+        with suppress(Exception):
+            remote = await client.node.fetch_player_info(guild.id)
+            if remote and remote.track and remote.track.encoded == track.encoded:
+                position = remote.state.position
+
+        track.extras = {"requester_id": record["requester_id"] or 0}
+        await client.play(
+            track,
+            start=position,
+            paused=record["paused"],
+            volume=record["volume"],
+        )
+        return True
+
+    @loop(seconds=Lavalink.STATS_INTERVAL)
+    async def monitor_nodes(self) -> None:
+        """Refresh node statistics and fail over players from unreachable nodes."""
+
+        for node in list(Pool.nodes.values()):
+            if node.status is NodeStatus.CONNECTED:
+                self.unhealthy.discard(node.identifier)
+                await refresh(node)
+                continue
+
+            # A single missed poll is usually wavelink resuming the session,
+            # so only move players once the node stays unreachable.
+            if node.identifier not in self.unhealthy:
+                self.unhealthy.add(node.identifier)
+                continue
+
+            forget(node)
+            players = [cast(Player, player) for player in node.players.values()]
+            if players and connected_nodes(exclude=[node]):
+                await self.migrate(node, players)
+
+    @monitor_nodes.before_loop
+    async def before_monitor_nodes(self) -> None:
+        await self.bot.wait_until_ready()
+
+    async def migrate(self, node: Node, players: List[Player]) -> None:
+        """Move the players of a failed node onto the healthiest remaining nodes."""
+
+        for player in players:
+            try:
+                target = select_node(exclude=[node])
+            except InvalidNodeException:
+                log.warning("No node is available to take over players from %s", node.identifier)
+                return
+
+            try:
+                if player.connected:
+                    await player.switch_node(target)
+                else:
+                    await self.reconnect(player)
+            except Exception as exc:
+                log.warning(
+                    "Failed to migrate player %s from %s: %s",
+                    player.guild.id,
+                    node.identifier,
+                    exc,
+                )
+            else:
+                log.info(
+                    "Migrated player %s from %s to %s",
+                    player.guild.id,
+                    node.identifier,
+                    target.identifier,
+                )
+
+    async def reconnect(self, player: Player) -> None:
+        """Rebuild a player which was disconnected alongside its node."""
+
+        track, position = player.current, player.position
+        # The queue is detached first so releasing the old player keeps it.
+        queue, player.queue = player.queue, Queue()
+        async with self.bot.voice.lock(player.guild.id):
+            if player.guild.voice_client:
+                await player.guild.voice_client.disconnect(force=True)
+
+            try:
+                client = await player.channel.connect(cls=Player, self_deaf=True)
+            except (TimeoutError, ClientException):
+                return
+
+        client.context = player.context
+        client.synthesize = player.synthesize
+        client.queue = queue
+        if track:
+            await client.play(
+                track,
+                start=position,
+                volume=player.volume,
+                add_history=False,
+            )
+
+    async def reap(self, player: Player, reason: str) -> None:
+        """Disconnect an abandoned player and release everything it holds."""
+
+        log.info("Disconnecting %s player in %s", reason, player.guild.id)
+        self.reaped[reason] += 1
+        with suppress(HTTPException, ClientException):
+            await player.disconnect()
+
+    @loop(seconds=Lavalink.REAP_INTERVAL)
+    async def reap_players(self) -> None:
+        """Disconnect players nobody has listened to or resumed for too long."""
+
+        now = monotonic()
+        for client in list(self.bot.voice_clients):
+            if not isinstance(client, Player):
+                continue
+
+            if client.paused:
+                client.paused_since = client.paused_since or now
+
+            if client.alone_since and now - client.alone_since >= Lavalink.ALONE_TIMEOUT:
+                await self.reap(client, "alone")
+
+            elif client.paused_since and now - client.paused_since >= Lavalink.PAUSED_TIMEOUT:
+                await self.reap(client, "paused")
+
+    @reap_players.before_loop
+    async def before_reap_players(self) -> None:
+        await self.bot.wait_until_ready()
+
+    @Cog.listener()
+    async def on_wavelink_inactive_player(self, player: Player) -> None:
+        # Dispatched by wavelink once nothing has played for `inactive_timeout`.
+        # Players synthesizing the voice chat are expected to sit idle between
+        # messages, so they are only reaped once everybody has left.
+        if not player.connected or (player.synthesize and not player.alone_since):
+            return
+
+        await self.reap(player, "idle")
+
+    @Cog.listener()
+    async def on_voice_state_update(
+        self,
+        member: Member,
+        before: VoiceState,
+        after: VoiceState,
+    ) -> None:
+        client = member.guild.voice_client
+        if not isinstance(client, Player) or not client.channel:
+            return
+
+        if client.channel not in (before.channel, after.channel):
+            return
+
+        session = self.bot.voice.get(member.guild.id)
+        if session and session.listeners:
+            client.alone_since = None
+        elif not client.alone_since:
+            client.alone_since = monotonic()
+
+    @loop(seconds=History.FLUSH_INTERVAL)
+    async def flush_history(self) -> None:
+        await self.history.flush()
+
+    @loop(time=time(hour=History.WARM_HOUR, tzinfo=timezone.utc))
+    async def warm_caches(self) -> None:
+        await self.history.prune()
+        await self.history.warm()
+
+    @warm_caches.before_loop
+    async def before_warm_caches(self) -> None:
+        await self.bot.wait_until_ready()
+
+    @Cog.listener()
+    async def on_wavelink_player_update(self, payload: PlayerUpdateEventPayload) -> None:
+        if isinstance(payload.player, Player):
+            payload.player.telemetry.update(
+                payload.position,
+                payload.ping,
+                payload.connected,
+            )
+
+    @Cog.listener()
+    async def on_wavelink_track_stuck(self, payload: TrackStuckEventPayload) -> None:
+        client = payload.player
+        if not isinstance(client, Player):
+            return
+
+        track = payload.track
+        client.telemetry.stuck += 1
+        log.warning(
+            "Track %s got stuck for %sms in %s", track.identifier, payload.threshold, client.guild.id
+        )
+
+        # The track is restarted from where it got stuck once, if it gets
+        # stuck again it is skipped.
+        if client.telemetry.should_retry(track.encoded):
+            await client.play(track, start=client.position, add_history=False)
+            return
+
+        await client.skip(force=True)
+        if client.context:
+            with suppress(HTTPException):
+                await client.context.warn(
+                    f"Skipped [**{track.title}**]({track.uri}) since it stopped playing",
+                    delete_after=10,
+                )
+
+    @Cog.listener()
+    async def on_wavelink_track_exception(self, payload: TrackExceptionEventPayload) -> None:
+        client = payload.player
+        if not isinstance(client, Player):
+            return
+
+        track = payload.track
+        client.telemetry.exceptions += 1
+        log.warning(
+            "Track %s failed in %s: %s",
+            track.identifier,
+            client.guild.id,
+            payload.exception.get("message"),
+        )
+
+        # The track end event which follows plays the head of the queue, so
+        # putting the track back there retries it once.
+        if client.telemetry.should_retry(track.encoded):
+            client.queue.put_at(0, track)
+            return
+
+        if client.context:
+            with suppress(HTTPException):
+                await client.context.warn(
+                    f"Skipped [**{track.title}**]({track.uri}) since it couldn't be played",
+                    delete_after=10,
+                )
+
+    @Cog.listener()
+    async def on_wavelink_node_closed(self, node: Node, disconnected: List[Player]):
+        forget(node)
+        if disconnected and connected_nodes(exclude=[node]):
+            await self.migrate(node, disconnected)
 
     async def cog_check(self, ctx: Context) -> None:
         c = await Player.from_context(ctx)
@@ -61,19 +557,16 @@ class Music(Cog):
     @Cog.listener()
     async def on_wavelink_track_end(self, payload: TrackEndEventPayload):
         client = cast(Player, payload.player)
-        if not client:
+        if not client or payload.reason == "replaced":
             return
 
-        if client.queue:
+        if client.next_track:
             await client.play(client.queue.get())
 
     def is_privileged(self, ctx: Context):
         """Check whether the user is an Admin or DJ."""
 
-        return (
-            ctx.author in (ctx.voice_client.dj, ctx.voice_client.requester)
-            or ctx.author.guild_permissions.kick_members
-        )
+        return ctx.voice_client.is_privileged(ctx.author)
 
     @Cog.listener()
     async def on_wavelink_track_start(self, payload: TrackStartEventPayload) -> None:
@@ -83,10 +576,16 @@ class Music(Cog):
         if not client:
             return
 
-        if client.context and track.source != "local":
+        if client.context and not is_speech(track):
+            self.history.play(client.guild.id, track)
             with suppress(HTTPException):
                 await client.send_panel(track)
 
+        elif is_speech(track):
+            await client.clear_panel()
+
+        client.prepare()
+
     @hybrid_command(aliases=("p",))
     async def play(
         self,
@@ -101,15 +600,14 @@ class Music(Cog):
         /play <file attachment>
         """
 
-        tts = query.startswith("tts:") if query else False
-        if query:
-            query = query.replace("tts:", "/tmp/wock/")
-
-        elif ctx.message.attachments:
+        if ctx.message.attachments:
             file = ctx.message.attachments[0]
 
         if file and not query:
-            query = file.url
+            # Attachments are served to Lavalink from the local media store,
+            # so replays never go back to Discord's CDN.
+            name = await self.bot.media.put_attachment(file)
+            query = self.bot.media.url(name) if name else file.url
 
         if not query and not file:
             return await ctx.warn(
@@ -118,39 +616,40 @@ class Music(Cog):
 
         result: Optional[Search] = None
         with suppress(LavalinkLoadException):
-            result = await Track.search(
+            result = await self.bot.search_cache.search(
                 query,
-                source=TrackSource.YouTube if not tts else "",  # type: ignore
+                source=TrackSource.YouTube,
             )
+            if result and not file:
+                self.history.search(
+                    ctx.guild.id,
+                    ctx.author.id,
+                    query,
+                    TrackSource.YouTube,
+                )
 
         if not result:
             return await ctx.warn(f"Couldn't find any results for **{query}**")
 
         if isinstance(result, Playlist):
-            for track in result.tracks:
-                track.extras = {"requester_id": ctx.author.id}
-
-            await ctx.voice_client.queue.put_wait(result)
+            ctx.voice_client.queue.put_lazy(result.tracks, ctx.author.id)
             await ctx.approve(
                 f"-# *Added [**{result.name}**]({result.url}) with {len(result.tracks)} {pluralize('track', len(result.tracks))} to the queue*"
             )
         else:
             track = result[0]
             track.extras = {"requester_id": ctx.author.id}
-            if tts:
-                ctx.voice_client.synthesize = True
-                ctx.voice_client.queue.put_at(0, track)
-            else:
-                await ctx.voice_client.queue.put_wait(track)
-
-            if track.source != "local":
-                await ctx.approve(
-                    f"-# *Queued [**{track.title}**]({track.uri}) by **{track.author}***",
-                )
+            await ctx.voice_client.queue.put_wait(track)
+            await ctx.approve(
+                f"-# *Queued [**{track.title}**]({track.uri}) by **{track.author}***",
+            )
 
         if not ctx.voice_client.playing:
             await ctx.voice_client.play(ctx.voice_client.queue.get())
 
+        elif not ctx.voice_client.upcoming:
+            ctx.voice_client.prepare()
+
     @hybrid_command(aliases=("stop", "dc"))
     async def disconnect(self, ctx: Context) -> Message:
         """Stop the player and clear the queue."""
@@ -172,7 +671,7 @@ class Music(Cog):
             return await ctx.warn("There isn't a track being played")
 
         votes = ctx.voice_client.skip_votes
-        required = required_votes("skip", ctx.voice_client.channel)
+        required = required_votes("skip", ctx.voice_client.member_count)
         if ctx.author in votes:
             return await ctx.warn("You have already voted to skip this track")
 
@@ -269,7 +768,7 @@ class Music(Cog):
             return await ctx.warn("There isn't a track being played")
 
         embed = await ctx.voice_client.embed(track)
-        return await ctx.reply(embed=embed, view=Panel(self))
+        return await ctx.reply(embed=embed, view=Panel(ctx.voice_client))
 
     @hybrid_group(invoke_without_command=True)
     async def queue(self, ctx: Context) -> Union[Message, Paginator]:
@@ -278,24 +777,26 @@ class Music(Cog):
         if not (tracks := ctx.voice_client.queue):
             return await ctx.warn("There are no tracks in the queue")
 
-        return await Paginator(
-            ctx=ctx,
-            entries=[
-                f"**{index + 1}.** [{track.title}]({track.uri}) by **{track.author}** {f'[{requester.mention}]'}"
-                for index, track in enumerate(tracks)
-                if (
-                    requester := ctx.guild.get_member(
-                        getattr(track.extras, "requester_id") or 0
-                    )
-                )
-            ],
-            embed=ctx.create(
+        total = len(tracks)
+        pages = math.ceil(total / 10)
+        footer = f"{total} {pluralize('track', total)} • {format_duration(tracks.duration)}"
+
+        def render(page: Sequence[QueuedTrack], index: int) -> Embed:
+            embed = ctx.create(
                 title="Queue",
-                footer={
-                    "text": f"{len(tracks)} {pluralize('track', len(tracks))} • {format_duration(sum(track.length for track in tracks))}",
-                },
-            )["embed"],
-        )
+                footer={"text": f"Page {index + 1}/{pages} • {footer}"},
+            )["embed"]
+            start = index * 10
+            embed.description = "\n".join(
+                f"**{start + offset + 1}.** [{track.title}]({track.uri}) by **{track.author}** [{requester.mention}]"
+                for offset, track in enumerate(page)
+                if (requester := ctx.guild.get_member(requester_of(track)))
+            )
+            return embed
+
+        # Only the viewed page is sliced out of the queue, so pending
+        # playlists stay lazy.
+        return await Paginator(ctx, entries=Pages(tracks, render, per_page=10))
 
     @queue.command(name="view", with_app_command=True)
     async def queue_view(self, ctx: Context) -> Union[Message, Paginator]:
@@ -322,10 +823,12 @@ class Music(Cog):
                 "You do not have permission to remove tracks from the queue."
             )
 
-        if not (track := ctx.voice_client.queue[index]):
+        queue = ctx.voice_client.queue
+        if not 0 < index <= len(queue):
             return await ctx.warn(f"Track at index **{index}** doesn't exist")
 
-        ctx.voice_client.queue.remove(track)
+        track = queue[index - 1]
+        queue.delete(index - 1)
         return await ctx.approve(f"Removed **{track.title}** from the queue")
 
     @queue.command(name="move")
@@ -353,9 +856,7 @@ class Music(Cog):
                 f"Invalid new position - must be between `1` and `{len(queue)}`"
             )
 
-        track = queue[position - 1]
-        queue.remove(track)
-        queue.put_at(new_position - 1, track)
+        track = queue.move(position - 1, new_position - 1)
         return await ctx.approve(
             f"Moved [**{track.title}**]({track.uri}) to `{new_position}` in the queue"
         )
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, List, Optional, Set, Tuple
+
+from asyncpg import PostgresError
+from wavelink import LavalinkLoadException, TrackSource
+
+from config import History
+from system.lavalink.search import normalize
+
+from .player.metadata import clean_title
+from .player.queue import Track, requester_of
+
+if TYPE_CHECKING:
+    from wock import Wock
+
+log = logging.getLogger(__name__)
+
+COLUMNS = (
+    "kind",
+    "guild_id",
+    "user_id",
+    "query",
+    "source",
+    "identifier",
+    "title",
+    "author",
+    "length",
+    "created_at",
+)
+
+Event = Tuple[
+    str,
+    int,
+    int,
+    Optional[str],
+    str,
+    Optional[str],
+    Optional[str],
+    Optional[str],
+    int,
+    datetime,
+]
+
+
+class PlayHistory:
+    """Buffered log of searches and track starts.
+
+    Events are kept in memory and written to `play_events` with a single
+    COPY per batch, so recording a play never costs its own insert. The
+    log is also used to warm the search and title caches with whatever is
+    played the most.
+    """
+
+    def __init__(self, bot: Wock) -> None:
+        self.bot = bot
+        self.buffer: List[Event] = []
+        self.lock = asyncio.Lock()
+        self.flushes: Set[asyncio.Task[int]] = set()
+        self.flushed = 0
+        self.dropped = 0
+        self.warmed = 0
+
+    def push(self, event: Event) -> None:
+        self.buffer.append(event)
+        if len(self.buffer) > History.BUFFER_LIMIT:
+            # The database has been unreachable for a while, the oldest
+            # events are dropped instead of growing without bound.
+            overflow = len(self.buffer) - History.BUFFER_LIMIT
+            del self.buffer[:overflow]
+            self.dropped += overflow
+
+        if len(self.buffer) >= History.BATCH_SIZE and not self.lock.locked():
+            task = asyncio.create_task(self.flush())
+            self.flushes.add(task)
+            task.add_done_callback(self.settle)
+
+    def settle(self, task: asyncio.Task[int]) -> None:
+        self.flushes.discard(task)
+        if not task.cancelled() and (exc := task.exception()):
+            log.warning("Failed to flush play events: %s", exc)
+
+    def search(self, guild_id: int, user_id: int, query: str, source: TrackSource) -> None:
+        query, source_name = normalize(query, source)
+        self.push(
+            (
+                "search",
+                guild_id,
+                user_id,
+                query,
+                source_name,
+                None,
+                None,
+                None,
+                0,
+                datetime.now(timezone.utc),
+            )
+        )
+
+    def play(self, guild_id: int, track: Track) -> None:
+        self.push(
+            (
+                "play",
+                guild_id,
+                requester_of(track),
+                None,
+                track.source,
+                track.identifier,
+                track.title,
+                track.author,
+                track.length,
+                datetime.now(timezone.utc),
+            )
+        )
+
+    async def flush(self) -> int:
+        """Write the buffered events with COPY and return how many were written."""
+
+        async with self.lock:
+            if not self.buffer:
+                return 0
+
+            events, self.buffer = self.buffer, []
+            try:
+                await self.bot.pool.copy_records_to_table(
+                    "play_events",
+                    records=events,
+                    columns=COLUMNS,
+                )
+            except (PostgresError, OSError) as exc:
+                log.warning("Failed to flush %s play events: %s", len(events), exc)
+                self.buffer[:0] = events
+                return 0
+
+            self.flushed += len(events)
+            return len(events)
+
+    async def close(self) -> None:
+        """Wait for the flushes in flight and write whatever is left."""
+
+        if self.flushes:
+            await asyncio.wait(self.flushes)
+
+        await self.flush()
+
+    async def prune(self) -> None:
+        await self.bot.pool.execute(
+            "DELETE FROM play_events WHERE created_at < NOW() - $1 * INTERVAL '1 day'",
+            History.RETENTION_DAYS,
+        )
+
+    async def warm(self) -> int:
+        """Pre-load the most popular searches and titles into their caches."""
+
+        query = """
+        SELECT query, source
+        FROM play_events
+        WHERE kind = 'search'
+        AND created_at > NOW() - $1 * INTERVAL '1 day'
+        GROUP BY query, source
+        ORDER BY COUNT(*) DESC
+        LIMIT $2
+        """
+        searches = await self.bot.pool.fetch(
+            query,
+            History.WARM_WINDOW_DAYS,
+            History.WARM_SEARCHES,
+        )
+
+        query = """
+        SELECT title, author
+        FROM play_events
+        WHERE kind = 'play'
+        AND source LIKE 'youtube%'
+        AND created_at > NOW() - $1 * INTERVAL '1 day'
+        GROUP BY identifier, title, author
+        ORDER BY COUNT(*) DESC
+        LIMIT $2
+        """
+        tracks = await self.bot.pool.fetch(
+            query,
+            History.WARM_WINDOW_DAYS,
+            History.WARM_TRACKS,
+        )
+        for record in tracks:
+            clean_title(record["title"], record["author"])
+
+        warmed = 0
+        cache = self.bot.search_cache
+        for record in searches:
+            key = (record["query"], record["source"])
+            if key in cache.entries:
+                continue
+
+            try:
+                await cache.search(record["query"], source=record["source"] or None)
+            except LavalinkLoadException:
+                continue
+            except Exception as exc:
+                # Nodes may go away halfway through, whatever was warmed so
+                # far is kept.
+                log.warning("Stopped warming the search cache: %s", exc)
+                break
+
+            warmed += 1
+            await asyncio.sleep(History.WARM_DELAY)
+
+        self.warmed += warmed
+        log.info(
+            "Warmed %s searches and %s titles from the play history",
+            warmed,
+            len(tracks),
+        )
+        return warmed
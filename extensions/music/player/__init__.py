@@ -1,38 +1,81 @@
 from __future__ import annotations
+import asyncio
+import sys
 from contextlib import suppress
-from typing import TYPE_CHECKING, Optional
-from cashews import cache
-from discord import ClientException, Embed, Guild, HTTPException, Member, Message
+from itertools import takewhile
+from time import monotonic
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+from discord import ClientException, Embed, Guild, HTTPException, Member, Message, NotFound
 from discord.opus import OpusNotLoaded
 from discord.utils import escape_markdown
 from wavelink.filters import Filters
+from wavelink import InvalidNodeException, Node, QueueMode
 from wavelink import Player as BasePlayer
-from wavelink import Playable as Track
+from wavelink import Playable
 
-from yarl import URL
+from config import Lavalink, Speech
+from system.lavalink import admits, select_node
+from system.lavalink.telemetry import PlayerTelemetry
+from system.voice import VoiceSession
 from system.utils import format_duration
 from wock import Wock
+from .metadata import clean_author, clean_title
 from .panel import Panel
+from .queue import Queue, QueuedTrack, Track, is_speech, requester_of
 
 if TYPE_CHECKING:
     from .. import Context
 
 
 class Player(BasePlayer):
-    bot: Wock
     guild: Guild
     context: Context
     skip_votes: list[Member]
     controller: Optional[Message]
-    synthesize: bool
+    panel_state: Tuple[Optional[Dict[str, Any]], Optional[Tuple]]
+    upcoming: Optional[Tuple[Track, Embed]]
+    queue: Queue
+    alone_since: Optional[float]
+    paused_since: Optional[float]
+    telemetry: PlayerTelemetry
 
     def __init__(self, *args, **kwargs):
+        # `setdefault` would select a node even when one was passed in.
+        if "nodes" not in kwargs:
+            kwargs["nodes"] = [select_node()]
+
         super().__init__(*args, **kwargs)
-        self.inactive_timeout = 180
-        self.bot = self.client
+        self.inactive_timeout = Lavalink.IDLE_TIMEOUT
+        self.queue = Queue()
         self.skip_votes = []
         self.controller = None
-        self.synthesize = False
+        self.panel_state = (None, None)
+        self._synthesize = False
+        self.upcoming = None
+        self.alone_since = None
+        self.paused_since = None
+        self.telemetry = PlayerTelemetry(Lavalink.PLAYER_SERIES_SIZE)
+        self._released = False
+        self._preparing: Optional[asyncio.Task] = None
+        self._utterance: Optional[asyncio.Task] = None
+        self._spoken: Optional[Playable] = None
+
+    @property
+    def bot(self) -> Wock:
+        # Players created up front for a specific node, `cls=Player(nodes=...)`,
+        # are only bound to the client once connected.
+        return self.client  # type: ignore
+
+    @property
+    def synthesize(self) -> bool:
+        """Whether messages sent in the voice channel are synthesized."""
+
+        return self._synthesize
+
+    @synthesize.setter
+    def synthesize(self, value: bool) -> None:
+        self._synthesize = value
+        self.bot.voice.set_synthesize(self.guild.id, value)
 
     @property
     def dj(self) -> Member:
@@ -44,36 +87,213 @@ class Player(BasePlayer):
         if not track:
             return
         
-        return self.guild.get_member(getattr(track.extras, "requester_id") or 0)
+        return self.requested_by(track)
+
+    @property
+    def voice_session(self) -> Optional[VoiceSession]:
+        return self.bot.voice.get(self.guild.id)
+
+    @property
+    def member_count(self) -> int:
+        """The number of members in the voice channel, including the bot."""
+
+        if session := self.voice_session:
+            return len(session.members)
+
+        return len(self.channel.members)
+
+    def is_listening(self, member: Member) -> bool:
+        return self.bot.voice.is_listening(self.guild.id, member.id)
+
+    def is_privileged(self, member: Member) -> bool:
+        """Check whether a member is the DJ, the requester of the current
+        track or a moderator."""
+
+        return (
+            member.id == self.context.author.id
+            or bool(self.current and member.id == requester_of(self.current))
+            or member.guild_permissions.kick_members
+        )
+
+    def requested_by(self, track: Track) -> Optional[Member]:
+        return self.guild.get_member(requester_of(track))
+
+    @property
+    def next_track(self) -> Optional[Track]:
+        """The track which will be played once the current one ends."""
+
+        queue = self.queue
+        if queue.mode == QueueMode.loop and queue.loaded:
+            return queue.loaded
+
+        if queue:
+            return queue[0]
+
+        if queue.mode == QueueMode.loop_all and queue.history:
+            return queue.history[0]
+
+    def prepare(self) -> None:
+        """Resolve the next track and render its embed in the background,
+        so the track end handler only has to issue the play request."""
+
+        if self._preparing and not self._preparing.done():
+            self._preparing.cancel()
+
+        self._preparing = asyncio.create_task(self._prepare())
+
+    async def _prepare(self) -> None:
+        track = self.next_track
+        if not track or not track.encoded:
+            self.upcoming = None
+            return
+
+        if self.upcoming and self.upcoming[0].encoded == track.encoded:
+            return
+
+        self.upcoming = (track, await self.embed(track))
+
+    async def render(self, track: Track) -> Embed:
+        """Return the embed for a track, using the pre-rendered one when possible."""
+
+        if self.upcoming and self.upcoming[0].encoded == track.encoded:
+            _, embed = self.upcoming
+            self.upcoming = None
+            return embed
+
+        return await self.embed(track)
+
+    def speak(self, chunks: Sequence[asyncio.Future[str]], requester_id: int) -> asyncio.Task:
+        """Queue synthesized chunks in order as each one becomes ready.
+
+        `chunks` resolve to the media names of consecutive parts of a single
+        utterance, the first one starts playing as soon as it is ready while
+        the rest are still being synthesized. Utterances are queued behind
+        the speech which hasn't been played yet, the returned task finishes
+        once every chunk is queued.
+        """
+
+        self._utterance = asyncio.create_task(self._utter(chunks, requester_id))
+        return self._utterance
+
+    def interrupt(self) -> None:
+        """Cancel the chunks of the current utterance which haven't played yet."""
+
+        if self._utterance and not self._utterance.done():
+            self._utterance.cancel()
+
+        self._utterance = None
+
+    @property
+    def pending_speech(self) -> int:
+        """The number of speech chunks at the front of the queue."""
+
+        return sum(1 for _ in takewhile(is_speech, self.queue))
+
+    async def wait_for_speech(self, ahead: int) -> None:
+        """Wait until at most `ahead` speech chunks are left to be played."""
+
+        while self.connected and self.pending_speech > ahead:
+            with suppress(asyncio.TimeoutError):
+                await self.bot.wait_for(
+                    "wavelink_track_start",
+                    check=lambda payload: payload.player is self,
+                    timeout=Speech.UTTERANCE_TTL,
+                )
+
+    async def _utter(self, chunks: Sequence[asyncio.Future[str]], requester_id: int) -> None:
+        queued: List[Playable] = []
+        try:
+            for chunk in chunks:
+                try:
+                    name = await chunk
+                    result = await Playable.search(
+                        self.bot.media.speech_url(name),
+                        source="",
+                    )
+                except Exception:
+                    # A single chunk failing only leaves a gap in the speech.
+                    continue
+
+                if not result:
+                    continue
+
+                track = result[0]
+                track.extras = {"requester_id": requester_id}
+
+                # Each chunk goes right behind the last speech queued, or to
+                # the front once that has started playing.
+                anchor = queued[-1] if queued else self._spoken
+                position = 0
+                if anchor and anchor in self.queue:
+                    position = self.queue.index(anchor) + 1
+
+                self.queue.put_at(position, track)
+                queued.append(track)
+                self._spoken = track
+
+                self.synthesize = True
+                if not self.playing:
+                    await self.play(self.queue.get())
+
+        except asyncio.CancelledError:
+            for track in queued:
+                self.queue.remove(track)
+
+            raise
+
+        finally:
+            for chunk in chunks:
+                if not chunk.done():
+                    chunk.cancel()
+
+                elif not chunk.cancelled():
+                    # Failures of skipped chunks are already handled.
+                    chunk.exception()
 
     @classmethod
     async def from_context(cls, ctx: Context) -> Optional[Message]:
-        if ctx.command.name in ("dialect", "preference"):
+        command = ctx.command.root_parent or ctx.command
+        if command.name in ("dialect", "preference", "slang"):
+            return
+
+        registry = ctx.bot.voice
+        if ctx.voice_client and registry.is_listening(ctx.guild.id, ctx.author.id):
             return
 
         if not (voice := ctx.author.voice) or not voice.channel:
             return await ctx.warn("You are not connected to a voice channel")
 
-        elif (bot_voice := ctx.guild.me.voice) and voice.channel != bot_voice.channel:
+        elif (channel_id := registry.channel_id(ctx.guild.id)) and voice.channel.id != channel_id:
             return await ctx.warn("You are not connected to my voice channel")
 
-        elif not bot_voice or not ctx.voice_client:
+        elif not channel_id or not ctx.voice_client:
             if ctx.command.name not in ("speak", "play"):
                 return await ctx.warn("I'm not connected to a voice channel")
 
-        if ctx.voice_client:
-            return
-
-        try:
-            player = await voice.channel.connect(
-                cls=cls,
-                self_deaf=True,
-            )
-            player.context = ctx
-        except (TimeoutError, ClientException, OpusNotLoaded) as exc:
-            return await ctx.warn(
-                f"I was not able to connect to {voice.channel.mention}"
-            )
+        # Connects are serialized per guild so concurrent commands don't
+        # race each other into the channel.
+        async with registry.lock(ctx.guild.id):
+            if ctx.voice_client:
+                return
+
+            try:
+                node = select_node()
+                if not admits(node):
+                    # Another player would only make playback stutter for
+                    # everybody already listening on the node.
+                    return await ctx.warn(
+                        "The music servers are under heavy load right now, please try again in a minute"
+                    )
+
+                player = await voice.channel.connect(
+                    cls=cls(nodes=[node]),
+                    self_deaf=True,
+                )
+                player.context = ctx
+            except (TimeoutError, ClientException, OpusNotLoaded, InvalidNodeException):
+                return await ctx.warn(
+                    f"I was not able to connect to {voice.channel.mention}"
+                )
 
     async def play(
         self,
@@ -88,13 +308,12 @@ class Player(BasePlayer):
         filters: Filters | None = None,
         populate: bool = False,
         max_populate: int = 5,
-    ) -> Track:
+    ) -> Playable:
         self.skip_votes.clear()
-        if self.controller:
-            with suppress(HTTPException):
-                await self.controller.delete()
+        if isinstance(track, QueuedTrack):
+            track = track.materialize()
 
-        return await super().play(
+        track = await super().play(
             track,
             replace=replace,
             start=start,
@@ -106,15 +325,54 @@ class Player(BasePlayer):
             populate=populate,
             max_populate=max_populate,
         )
+        return track
+
+    async def switch_node(self, node: Node) -> None:
+        """Move the player onto another node, keeping the queue and resuming
+        the current track from where it left off."""
+
+        track, position = self.current, self.position
+        with suppress(Exception):
+            await self.node._destroy_player(self.guild.id)
+
+        self.node._players.pop(self.guild.id, None)
+        self._node = node
+        node._players[self.guild.id] = self
+        await self._dispatch_voice_update()
+
+        if track:
+            await super().play(
+                track,
+                start=position,
+                paused=self.paused,
+                volume=self.volume,
+                filters=self.filters,
+                add_history=False,
+            )
 
     async def pause(self, value: bool) -> None:
         await super().pause(value)
+        self.paused_since = monotonic() if value else None
         await self.refresh_panel()
 
+    def footprint(self) -> int:
+        """Approximate number of bytes held by the player's queue and panel."""
+
+        size = self.queue.footprint()
+        if self.upcoming:
+            size += len(str(self.upcoming[1].to_dict()))
+
+        if self.panel_state[0]:
+            size += len(str(self.panel_state[0]))
+
+        return size + sys.getsizeof(self.skip_votes)
+
     async def embed(self, track: Track) -> Embed:
-        member = self.requester
+        member = self.requested_by(track)
+        author = track.author
         if track.source.startswith("youtube"):
-            deserialized = await self.deserialize(track.title)
+            deserialized = clean_title(track.title, author)
+            author = clean_author(author)
         else:
             deserialized = track.title
 
@@ -131,7 +389,7 @@ class Player(BasePlayer):
             ]
         )
         embed = Embed(
-            description=f"Now playing [**{escape_markdown(deserialized)}**]({track.uri}) by **{track.author}**"
+            description=f"Now playing [**{escape_markdown(deserialized)}**]({track.uri}) by **{author}**"
         )
         embed.set_footer(
             text=" • ".join(footer),
@@ -140,17 +398,55 @@ class Player(BasePlayer):
         return embed
 
     async def send_panel(self, track: Track) -> Optional[Message]:
-        embed = await self.embed(track)
+        """Show a track on the controller, editing the existing message in place.
+
+        A new message is only sent when the player has no controller yet or
+        it was deleted, and the edit is skipped when nothing would change.
+        """
+
+        embed = await self.render(track)
+        view = Panel(self)
+        state = (embed.to_dict(), view.state)
+        if self.controller:
+            if state == self.panel_state:
+                return self.controller
+
+            try:
+                self.controller = await self.controller.edit(embed=embed, view=view)
+            except NotFound:
+                self.controller = None
+            except HTTPException:
+                return self.controller
+            else:
+                self.panel_state = state
+                return self.controller
 
         with suppress(HTTPException):
-            self.controller = await self.context.send(embed=embed, view=Panel(self))
+            self.controller = await self.context.send(embed=embed, view=view)
+            self.panel_state = state
+
+        return self.controller
 
     async def refresh_panel(self):
         if not self.controller:
             return
 
+        view = Panel(self)
+        if view.state == self.panel_state[1]:
+            return
+
         with suppress(HTTPException):
-            await self.controller.edit(view=Panel(self))
+            await self.controller.edit(view=view)
+            self.panel_state = (self.panel_state[0], view.state)
+
+    async def clear_panel(self) -> None:
+        """Remove the controller, used when the player stops showing a track."""
+
+        controller, self.controller = self.controller, None
+        self.panel_state = (None, None)
+        if controller:
+            with suppress(HTTPException):
+                await controller.delete()
 
     def pretty_source(self, track: Track) -> tuple[str | None, str | None]:
         if track.source == "spotify":
@@ -179,25 +475,46 @@ class Player(BasePlayer):
 
         return None, None
 
-    @cache(ttl="30s")
-    async def deserialize(self, query: str) -> str:
-        response = await self.bot.session.post(
-            URL.build(
-                scheme="https",
-                host="metadata-filter.vercel.app",
-                path="/api/youtube",
-                query={"track": query},
-            ),
-        )
-        with suppress(Exception):
-            data = await response.json()
-            return data["data"]["track"]
+    async def disconnect(self, **kwargs: Any) -> None:
+        if self.bot.is_closed():
+            # On shutdown the player is left on its node and in the channel.
+            # The node keeps it for `resume_timeout` seconds, so the restarted
+            # bot resumes the same session with the track where it was.
+            self._invalidate()
+            self.node._players.pop(self.guild.id, None)
+            await self.release()
+            return
 
-        return query
+        await super().disconnect(**kwargs)
 
-    async def disconnect(self):
-        with suppress(HTTPException):
-            if self.controller:
-                await self.controller.delete()
+    async def _destroy(self) -> None:
+        # Runs for both explicit disconnects and the bot being removed from
+        # the channel, so every resource is released in one place.
+        await super()._destroy()
+        await self.release()
+
+    async def release(self) -> None:
+        """Free the queue, pre-rendered embed and controller of the player."""
 
-        return await super().disconnect()
+        if self._released:
+            return
+
+        self._released = True
+        self.interrupt()
+        self.bot.voice.set_synthesize(self.guild.id, False)
+        if self._preparing:
+            self._preparing.cancel()
+            self._preparing = None
+
+        self.upcoming = None
+        self.skip_votes.clear()
+        await self.clear_panel()
+
+        if not self.bot.is_closed():
+            # Players disconnected by a shutdown keep their queue and snapshot
+            # so they can be resumed once the bot is back.
+            self.queue.reset()
+            await self.bot.pool.execute(
+                "DELETE FROM player_sessions WHERE guild_id = $1",
+                self.guild.id,
+            )
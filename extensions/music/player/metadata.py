@@ -0,0 +1,66 @@
+import re
+from functools import lru_cache
+from typing import Optional
+
+# Bracketed segments are only removed when every word inside them is noise,
+# so titles such as "Song (Acoustic)" or "Song [Live at Wembley]" survive.
+BRACKETS = re.compile(r"\s*(?:\(([^()]*)\)|\[([^\[\]]*)\]|【([^【】]*)】)")
+NOISE = re.compile(
+    r"^(?:\s|[-/&+,]|official|oficial|officiel(?:le)?|music|lyrics?|audio|vid[eé]o|visuali[sz]er|"
+    r"hd|hq|4k|1080p|720p|mv|m/v|explicit|clean|clip|full|version|color|coded|"
+    r"with|on|screen|animated|performance)+$",
+    re.IGNORECASE,
+)
+FEATURING = re.compile(
+    r"\s*(?:\(\s*|\[\s*)?\b(?:ft|feat|featuring)\b\.?\s+[^()\[\]|]*?(?:\)|\]|(?=\s+[-|–—]\s)|$)",
+    re.IGNORECASE,
+)
+SUFFIXES = re.compile(
+    r"\s*(?:[-|–—:]\s*)?\b(?:official\s+(?:music\s+)?(?:video|audio|lyric\s+video|visuali[sz]er)|"
+    r"lyrics?\s+video|lyrics|audio\s+only)\s*$",
+    re.IGNORECASE,
+)
+SEPARATOR = re.compile(r"\s+[-|–—]\s+")
+# What follows a pipe once the artist is split off is an album or channel plug.
+TRAILER = re.compile(r"\s+\|\s+.*$")
+CHANNEL = re.compile(r"(?:\s*-\s*topic|vevo|\s+official)$", re.IGNORECASE)
+LEFTOVERS = re.compile(r"(?:^[\s\-|–—:]+|[\s\-|–—:]+$)")
+WHITESPACE = re.compile(r"\s{2,}")
+
+
+def _strip_brackets(match: re.Match[str]) -> str:
+    inner = next(group for group in match.groups() if group is not None)
+    return "" if NOISE.match(inner) else match.group(0)
+
+
+@lru_cache(maxsize=8192)
+def clean_author(author: str) -> str:
+    """Remove channel decorations such as "- Topic" or "VEVO" from an author."""
+
+    return CHANNEL.sub("", author).strip() or author
+
+
+@lru_cache(maxsize=8192)
+def clean_title(title: str, author: Optional[str] = None) -> str:
+    """Strip video decorations from a YouTube title.
+
+    Removes bracketed noise like "(Official Video)" or "[Lyrics]", featured
+    artist credits and trailing "Official Audio" style suffixes. When the
+    title is prefixed with the uploading artist ("Artist - Song"), only the
+    song part is kept, without an album or channel plug after a pipe.
+    Results are cached since the same titles repeat across guilds.
+    """
+
+    cleaned = BRACKETS.sub(_strip_brackets, title)
+    cleaned = FEATURING.sub("", cleaned)
+    cleaned = SUFFIXES.sub("", cleaned)
+
+    if author:
+        parts = SEPARATOR.split(cleaned, maxsplit=1)
+        artist = clean_author(author).casefold().replace(" ", "")
+        if len(parts) == 2 and artist and artist in parts[0].casefold().replace(" ", ""):
+            cleaned = parts[1]
+
+    cleaned = TRAILER.sub("", cleaned)
+    cleaned = WHITESPACE.sub(" ", LEFTOVERS.sub("", cleaned))
+    return cleaned or title
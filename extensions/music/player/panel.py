@@ -1,8 +1,9 @@
 from __future__ import annotations
 import math
-from typing import TYPE_CHECKING
-from discord import Embed, Interaction, ButtonStyle, VoiceChannel
-from discord.ui import View, button, Button
+import re
+from typing import TYPE_CHECKING, Optional, Tuple, cast
+from discord import Embed, Interaction, ButtonStyle
+from discord.ui import View, Button, DynamicItem
 from wavelink import QueueEmpty, QueueMode
 from config import Emojis
 from system.utils import pluralize
@@ -10,72 +11,97 @@ from system.utils import pluralize
 if TYPE_CHECKING:
     from .. import Context
     from ..player import Player
-    
-def required_votes(command: str, channel: VoiceChannel):
+
+def required_votes(command: str, members: int):
     """Method which returns required votes based on amount of members in a channel."""
 
-    required = math.ceil((len(channel.members) - 1) / 2.5)
+    required = math.ceil((members - 1) / 2.5)
     if command == "stop":
-        if len(channel.members) == 3:
+        if members == 3:
             required = 2
 
     return required or 1
 
-class Panel(View):
-    player: Player
 
-    def __init__(self, player: Player):
-        super().__init__(timeout=None)
-        self.player = player
+class PanelButton(
+    DynamicItem[Button],
+    template=r"panel:(?P<guild_id>[0-9]+):(?P<action>shuffle|previous|play|skip|mode)",
+):
+    """A panel button which is dispatched by its `custom_id`.
 
-    @property
-    def ctx(self) -> Context:
-        return self.player.context
+    The guild and action are encoded in the `custom_id`, so one registered
+    item class handles every panel and no view has to be kept in the view
+    store for as long as a player lives.
+    """
 
-    def refresh(self) -> None:
-        if self.player.paused:
-            self.play.emoji = Emojis.Music.PAUSED
-        else:
-            self.play.emoji = Emojis.Music.UNPAUSED
-
-        if self.player.queue.mode == QueueMode.loop_all:
-            self.mode.emoji = Emojis.Music.LOOP_QUEUE
-            self.mode.style = ButtonStyle.primary
-
-        elif self.player.queue.mode == QueueMode.loop:
-            self.mode.emoji = Emojis.Music.LOOP_TRACK
-            self.mode.style = ButtonStyle.primary
+    player: Player
 
-        else:
-            self.mode.emoji = Emojis.Music.NO_LOOP
-            self.mode.style = ButtonStyle.secondary
+    def __init__(
+        self,
+        guild_id: int,
+        action: str,
+        *,
+        emoji: Optional[str] = None,
+        style: ButtonStyle = ButtonStyle.secondary,
+    ):
+        super().__init__(
+            Button(
+                emoji=emoji,
+                style=style,
+                custom_id=f"panel:{guild_id}:{action}",
+            )
+        )
+        self.guild_id = guild_id
+        self.action = action
+
+    @classmethod
+    async def from_custom_id(
+        cls,
+        interaction: Interaction,
+        item: Button,
+        match: re.Match[str],
+    ) -> PanelButton:
+        return cls(
+            int(match["guild_id"]),
+            match["action"],
+            emoji=item.emoji,
+            style=item.style,
+        )
 
     async def interaction_check(self, interaction: Interaction) -> bool:
-        if interaction.user not in self.player.channel.members:
+        player = interaction.guild and interaction.guild.voice_client
+        if interaction.guild_id != self.guild_id or not player or not hasattr(player, "queue"):
+            embed = Embed(
+                description=f"{Emojis.Default.WARN} {interaction.user}: This **panel** is no longer active"
+            )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return False
+
+        self.player = cast("Player", player)
+        if not self.player.is_listening(interaction.user):
             embed = Embed(
                 description=f"{Emojis.Default.WARN} {interaction.user}: You must be in {self.player.channel.mention} to use this **panel**"
             )
             await interaction.response.send_message(embed=embed, ephemeral=True)
+            return False
 
-        return interaction.user in self.player.channel.members
+        return True
 
     def is_privileged(self, interaction: Interaction):
         """Check whether the user is an Admin or DJ."""
-        
-        return (
-            interaction.user in (self.player.dj, self.player.requester)
-            or interaction.user.guild_permissions.kick_members
-        )
-    
-    @button(emoji=Emojis.Music.SHUFFLE, style=ButtonStyle.secondary)
-    async def shuffle(self, interaction: Interaction, _: Button) -> None:
+
+        return self.player.is_privileged(interaction.user)
+
+    async def callback(self, interaction: Interaction) -> None:
+        return await getattr(self, self.action)(interaction)
+
+    async def shuffle(self, interaction: Interaction) -> None:
         self.player.queue.shuffle()
-        
+
         embed = Embed(description="Queue has been shuffled")
         return await interaction.response.send_message(embed=embed, ephemeral=True)
 
-    @button(emoji=Emojis.Music.PREVIOUS, style=ButtonStyle.secondary)
-    async def previous(self, interaction: Interaction, _: Button) -> None:
+    async def previous(self, interaction: Interaction) -> None:
         empty_embed = Embed(description="No previous track to play")
 
         if not self.player.queue.history or len(self.player.queue.history) == 0:
@@ -92,29 +118,22 @@ class Panel(View):
         embed = Embed(description=f"{interaction.user.mention} started the previous track")
         return await interaction.response.send_message(embed=embed, delete_after=4)
 
-    @button(emoji=Emojis.Music.UNPAUSED, style=ButtonStyle.primary)
-    async def play(self, interaction: Interaction, button: Button) -> None:
+    async def play(self, interaction: Interaction) -> None:
+        embed = Embed(description=f"{interaction.user.mention} has {'resumed' if self.player.paused else 'paused'} the current track")
+        await interaction.response.send_message(embed=embed, delete_after=4)
         await self.player.pause(not self.player.paused)
-        button.emoji = (
-            self.player.paused and Emojis.Music.PAUSED or Emojis.Music.UNPAUSED
-        )
 
-        embed = Embed(description=f"{interaction.user.mention} has {'paused' if self.player.paused else 'resumed'} the current track")
-        await interaction.response.send_message(embed=embed, delete_after=4)
-        return await self.player.controller.edit(view=self)
-    
-    @button(emoji=Emojis.Music.SKIP, style=ButtonStyle.secondary)
-    async def skip(self, interaction: Interaction, _: Button) -> None:
+    async def skip(self, interaction: Interaction) -> None:
         if self.player.queue.mode == QueueMode.loop:
             embed = Embed(description="Cannot skip track while looping track")
             return await interaction.response.send_message(embed=embed, ephemeral=True)
-        
+
         elif not self.player.current:
             embed = Embed(description="There isn't a track being played")
             return await interaction.response.send_message(embed=embed, ephemeral=True)
-        
+
         votes = self.player.skip_votes
-        required = required_votes("skip", self.player.channel)
+        required = required_votes("skip", self.player.member_count)
         if interaction.user in votes:
             embed = Embed(description="You have already voted to skip this track")
             return await interaction.response.send_message(embed=embed, ephemeral=True)
@@ -125,27 +144,78 @@ class Panel(View):
             await self.player.skip(force=True)
             embed = Embed(description=f"{interaction.user.mention} has skipped the current track")
             return await interaction.response.send_message(embed=embed, delete_after=4)
-        
-        
+
+
         embed = Embed(description=f"{interaction.user.mention} has voted to skip the current track (`{len(votes)}`/`{required}` required)")
         return await interaction.response.send_message(embed=embed)
 
-    @button(emoji=Emojis.Music.NO_LOOP, style=ButtonStyle.secondary)
-    async def mode(self, interaction: Interaction, button: Button) -> None:
+    async def mode(self, interaction: Interaction) -> None:
         queue = self.player.queue
 
         if queue.mode == QueueMode.loop_all:
             queue.mode = QueueMode.loop
-            button.emoji = Emojis.Music.LOOP_TRACK
-            button.style = ButtonStyle.primary
         elif queue.mode == QueueMode.loop:
             queue.mode = QueueMode.normal
-            button.emoji = Emojis.Music.NO_LOOP
-            button.style = ButtonStyle.secondary
         else:
             queue.mode = QueueMode.loop_all
-            button.emoji = Emojis.Music.LOOP_QUEUE
-            button.style = ButtonStyle.primary
 
-        return await interaction.response.edit_message(view=self)
+        view = Panel(self.player)
+        await interaction.response.edit_message(view=view)
+        if self.player.controller and interaction.message and interaction.message.id == self.player.controller.id:
+            self.player.panel_state = (self.player.panel_state[0], view.state)
+
+
+class Panel(View):
+    """The buttons of a now playing panel in their current state.
+
+    Every button is a `PanelButton`, so sending or editing a panel never
+    registers the view itself in the view store.
+    """
+
+    player: Player
+
+    def __init__(self, player: Player):
+        super().__init__(timeout=None)
+        self.player = player
+
+        guild_id = player.guild.id
+        self.add_item(PanelButton(guild_id, "shuffle", emoji=Emojis.Music.SHUFFLE))
+        self.add_item(PanelButton(guild_id, "previous", emoji=Emojis.Music.PREVIOUS))
+        self.play = PanelButton(guild_id, "play", emoji=Emojis.Music.UNPAUSED, style=ButtonStyle.primary)
+        self.add_item(self.play)
+        self.add_item(PanelButton(guild_id, "skip", emoji=Emojis.Music.SKIP))
+        self.mode = PanelButton(guild_id, "mode", emoji=Emojis.Music.NO_LOOP)
+        self.add_item(self.mode)
+        self.refresh()
+
+    @property
+    def ctx(self) -> Context:
+        return self.player.context
+
+    @property
+    def state(self) -> Tuple[Tuple[str, int], ...]:
+        """The rendered state of the buttons, used to skip redundant edits."""
+
+        return tuple(
+            (str(child.item.emoji), child.item.style.value)
+            for child in self.children
+            if isinstance(child, PanelButton)
+        )
+
+    def refresh(self) -> None:
+        if self.player.paused:
+            self.play.item.emoji = Emojis.Music.PAUSED
+        else:
+            self.play.item.emoji = Emojis.Music.UNPAUSED
+
+        if self.player.queue.mode == QueueMode.loop_all:
+            self.mode.item.emoji = Emojis.Music.LOOP_QUEUE
+            self.mode.item.style = ButtonStyle.primary
+
+        elif self.player.queue.mode == QueueMode.loop:
+            self.mode.item.emoji = Emojis.Music.LOOP_TRACK
+            self.mode.item.style = ButtonStyle.primary
 
+        else:
+            self.mode.item.emoji = Emojis.Music.NO_LOOP
+            self.mode.item.style = ButtonStyle.secondary
@@ -0,0 +1,678 @@
+from __future__ import annotations
+
+import random
+import sys
+from collections import Counter, deque
+from copy import copy
+from itertools import chain, islice
+from urllib.parse import urlsplit
+from typing import (
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    SupportsIndex,
+    Union,
+    cast,
+    overload,
+)
+
+from wavelink import Playable
+from wavelink import Queue as BaseQueue
+
+from system.media import SPEECH_PATH
+
+
+class QueuedTrack:
+    """Compact record of a queued track.
+
+    Only the encoded track and the fields the UI needs are kept, with
+    interned author and source strings. A full `Playable` is only built
+    by `materialize` right before the track is played.
+    """
+
+    __slots__ = (
+        "encoded",
+        "identifier",
+        "title",
+        "author",
+        "uri",
+        "length",
+        "source",
+        "is_seekable",
+        "is_stream",
+        "requester_id",
+    )
+
+    def __init__(
+        self,
+        encoded: str,
+        identifier: str,
+        title: str,
+        author: str,
+        uri: Optional[str],
+        length: int,
+        source: str,
+        is_seekable: bool,
+        is_stream: bool,
+        requester_id: int,
+    ) -> None:
+        self.encoded = encoded
+        self.identifier = identifier
+        self.title = title
+        self.author = sys.intern(author)
+        self.uri = uri
+        self.length = length
+        self.source = sys.intern(source)
+        self.is_seekable = is_seekable
+        self.is_stream = is_stream
+        self.requester_id = requester_id
+
+    @classmethod
+    def from_playable(cls, track: Playable) -> QueuedTrack:
+        return cls(
+            encoded=track.encoded,
+            identifier=track.identifier,
+            title=track.title,
+            author=track.author,
+            uri=track.uri,
+            length=track.length,
+            source=track.source,
+            is_seekable=track.is_seekable,
+            is_stream=track.is_stream,
+            requester_id=getattr(track.extras, "requester_id", 0) or 0,
+        )
+
+    def materialize(self) -> Playable:
+        """Build the full `Playable` for this track without contacting Lavalink."""
+
+        track = Playable(
+            {
+                "encoded": self.encoded,
+                "info": {
+                    "identifier": self.identifier,
+                    "isSeekable": self.is_seekable,
+                    "author": self.author,
+                    "length": self.length,
+                    "isStream": self.is_stream,
+                    "position": 0,
+                    "title": self.title,
+                    "uri": self.uri,
+                    "sourceName": self.source,
+                },
+                "pluginInfo": {},
+                "userData": {},
+            }
+        )
+        track.extras = {"requester_id": self.requester_id}
+        return track
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (QueuedTrack, Playable)):
+            return self.encoded == other.encoded
+
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.encoded)
+
+    def __str__(self) -> str:
+        return self.title
+
+    def __repr__(self) -> str:
+        return f"QueuedTrack(title={self.title!r}, author={self.author!r})"
+
+
+Track = Union[QueuedTrack, Playable]
+
+
+def compact(track: Track) -> QueuedTrack:
+    if isinstance(track, QueuedTrack):
+        return track
+
+    return QueuedTrack.from_playable(track)
+
+
+def footprint(track: Track) -> int:
+    """Approximate number of bytes held by a track and its strings."""
+
+    track = compact(track)
+    return (
+        sys.getsizeof(track)
+        + sys.getsizeof(track.encoded)
+        + sys.getsizeof(track.identifier)
+        + sys.getsizeof(track.title)
+        + sys.getsizeof(track.uri or "")
+    )
+
+
+def requester_of(track: Track) -> int:
+    if isinstance(track, QueuedTrack):
+        return track.requester_id
+
+    return getattr(track.extras, "requester_id", 0) or 0
+
+
+def is_speech(track: Track) -> bool:
+    """Whether a track is synthesized speech streamed from the media server."""
+
+    return bool(track.uri) and urlsplit(track.uri).path.startswith(SPEECH_PATH)
+
+
+class Cursor:
+    """Lazy view over tracks which have been queued but not yet materialized.
+
+    Playlists are queued as a cursor holding a reference to their tracks,
+    which are only turned into `QueuedTrack` records a window at a time.
+    """
+
+    __slots__ = ("tracks", "offset", "requester_id", "duration")
+
+    def __init__(self, tracks: List[Track], requester_id: Optional[int] = None) -> None:
+        self.tracks: List[Optional[Track]] = list(tracks)
+        self.offset = 0
+        self.requester_id = requester_id
+        self.duration = sum(track.length for track in tracks)
+
+    def __len__(self) -> int:
+        return len(self.tracks) - self.offset
+
+    def record(self, track: Track) -> QueuedTrack:
+        record = compact(track)
+        if self.requester_id is not None and record.requester_id != self.requester_id:
+            record = copy(record)
+            record.requester_id = self.requester_id
+
+        return record
+
+    def requesters(self) -> Counter[int]:
+        if self.requester_id is not None:
+            return Counter({self.requester_id: len(self)})
+
+        return Counter(
+            requester_of(track)
+            for track in islice(self.tracks, self.offset, None)
+            if track is not None
+        )
+
+    def peek(self, start: int = 0) -> Iterator[QueuedTrack]:
+        """Iterate over the remaining tracks from `start` without consuming them."""
+
+        return (
+            self.record(track)
+            for track in islice(self.tracks, self.offset + start, None)
+            if track is not None
+        )
+
+    def take(self, count: int) -> List[QueuedTrack]:
+        """Consume and materialize up to `count` tracks."""
+
+        end = min(self.offset + count, len(self.tracks))
+        records: List[QueuedTrack] = []
+        for index in range(self.offset, end):
+            track = cast(Track, self.tracks[index])
+            records.append(self.record(track))
+            self.duration -= track.length
+            # Drop the reference so consumed tracks can be freed.
+            self.tracks[index] = None
+
+        self.offset = end
+        return records
+
+
+class TrackList:
+    """A positional list of compact tracks split into bounded chunks.
+
+    A Fenwick tree over the chunk sizes finds the chunk holding any index in
+    O(log n), so inserts, removals and moves never shift the whole queue.
+    Tracks queued in bulk stay behind the materialized chunks as lazy
+    cursors and are pulled in `WINDOW` tracks at a time as the head drains
+    or an index past it is accessed. The total duration and the number of
+    tracks per requester cover both and are kept up to date on every
+    mutation.
+    """
+
+    LOAD = 256
+    WINDOW = 25
+
+    __slots__ = (
+        "_chunks",
+        "_tree",
+        "_length",
+        "_pending",
+        "_pending_length",
+        "duration",
+        "_requesters",
+    )
+
+    def __init__(self, items: Iterable[Track] = ()) -> None:
+        self._chunks: List[List[QueuedTrack]] = []
+        self._tree: List[int] = [0]
+        self._length = 0
+        self._pending: Deque[Cursor] = deque()
+        self._pending_length = 0
+        self.duration = 0
+        self._requesters: Counter[int] = Counter()
+        self.extend(items)
+
+    def _added(self, track: QueuedTrack) -> None:
+        self.duration += track.length
+        self._requesters[track.requester_id] += 1
+
+    def _removed(self, track: QueuedTrack) -> None:
+        self.duration -= track.length
+        requester = track.requester_id
+        self._requesters[requester] -= 1
+        if self._requesters[requester] <= 0:
+            del self._requesters[requester]
+
+    @property
+    def requesters(self) -> Counter[int]:
+        """The number of tracks per requester ID.
+
+        Cursors restored without a single requester are only counted when
+        asked for, or as their tracks are materialized.
+        """
+
+        unattributed = [cursor for cursor in self._pending if cursor.requester_id is None]
+        if not unattributed:
+            return self._requesters
+
+        requesters = self._requesters.copy()
+        for cursor in unattributed:
+            requesters.update(cursor.requesters())
+
+        return requesters
+
+    def _build(self) -> None:
+        size = len(self._chunks)
+        tree = [0] * (size + 1)
+        for index, chunk in enumerate(self._chunks, start=1):
+            tree[index] += len(chunk)
+            parent = index + (index & -index)
+            if parent <= size:
+                tree[parent] += tree[index]
+
+        self._tree = tree
+
+    def _update(self, chunk: int, delta: int) -> None:
+        tree = self._tree
+        index = chunk + 1
+        while index < len(tree):
+            tree[index] += delta
+            index += index & -index
+
+    def _locate(self, index: int) -> tuple[int, int]:
+        """Return the chunk and offset of an absolute index."""
+
+        tree = self._tree
+        position = 0
+        step = 1 << (len(tree) - 1).bit_length()
+        while step:
+            following = position + step
+            if following < len(tree) and tree[following] <= index:
+                position = following
+                index -= tree[following]
+
+            step >>= 1
+
+        return position, index
+
+    def _fill(self, size: int) -> None:
+        """Materialize pending tracks until the head holds at least `size` tracks."""
+
+        if self._length >= size or not self._pending:
+            return
+
+        count = max(size - self._length, self.WINDOW)
+        records: List[QueuedTrack] = []
+        while self._pending and len(records) < count:
+            cursor = self._pending[0]
+            taken = cursor.take(count - len(records))
+            if cursor.requester_id is None:
+                self._requesters.update(record.requester_id for record in taken)
+
+            records.extend(taken)
+            if not cursor:
+                self._pending.popleft()
+
+        self._pending_length -= len(records)
+        if self._chunks and len(self._chunks[-1]) < self.LOAD:
+            room = self.LOAD - len(self._chunks[-1])
+            self._chunks[-1].extend(records[:room])
+            records = records[room:]
+
+        self._chunks.extend(
+            records[index : index + self.LOAD]
+            for index in range(0, len(records), self.LOAD)
+        )
+        self._length = sum(len(chunk) for chunk in self._chunks)
+        self._build()
+
+    def _normalize(self, index: SupportsIndex) -> int:
+        position = index.__index__()
+        if position < 0:
+            position += len(self)
+
+        if not 0 <= position < len(self):
+            raise IndexError("queue index out of range")
+
+        self._fill(position + 1)
+        return position
+
+    @property
+    def pending(self) -> int:
+        """The number of tracks which have not been materialized yet."""
+
+        return self._pending_length
+
+    def defer(self, cursor: Cursor) -> None:
+        """Queue the tracks of a cursor at the end without materializing them."""
+
+        if not cursor:
+            return
+
+        self._pending.append(cursor)
+        self._pending_length += len(cursor)
+        self.duration += cursor.duration
+        if cursor.requester_id is not None:
+            self._requesters[cursor.requester_id] += len(cursor)
+        self._fill(self.WINDOW)
+
+    def _peek(self, start: int) -> Iterator[QueuedTrack]:
+        # Whole cursors before `start` are skipped without compacting a track.
+        for cursor in self._pending:
+            if start >= len(cursor):
+                start -= len(cursor)
+                continue
+
+            yield from cursor.peek(start)
+            start = 0
+
+    def __len__(self) -> int:
+        return self._length + self._pending_length
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __iter__(self) -> Iterator[QueuedTrack]:
+        return chain(
+            chain.from_iterable(self._chunks),
+            chain.from_iterable(cursor.peek() for cursor in self._pending),
+        )
+
+    def __reversed__(self) -> Iterator[QueuedTrack]:
+        if self._pending:
+            return reversed(list(self))
+
+        return chain.from_iterable(reversed(chunk) for chunk in reversed(self._chunks))
+
+    def __contains__(self, track: object) -> bool:
+        return any(track == item for item in self)
+
+    @overload
+    def __getitem__(self, index: SupportsIndex) -> QueuedTrack: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[QueuedTrack]: ...
+
+    def __getitem__(
+        self, index: Union[SupportsIndex, slice]
+    ) -> Union[QueuedTrack, List[QueuedTrack]]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return list(self)[index]
+
+            if start >= stop:
+                return []
+
+            if start >= self._length:
+                # Pages past the materialized head are read straight off the
+                # cursors, so paginating a large playlist does not expand it.
+                return list(islice(self._peek(start - self._length), stop - start))
+
+            chunk, offset = self._locate(start)
+            items = chain(
+                islice(self._chunks[chunk], offset, None),
+                chain.from_iterable(self._chunks[chunk + 1 :]),
+                chain.from_iterable(cursor.peek() for cursor in self._pending),
+            )
+            return list(islice(items, stop - start))
+
+        chunk, offset = self._locate(self._normalize(index))
+        return self._chunks[chunk][offset]
+
+    def __setitem__(self, index: SupportsIndex, track: Track) -> None:
+        track = compact(track)
+        chunk, offset = self._locate(self._normalize(index))
+        self._removed(self._chunks[chunk][offset])
+        self._chunks[chunk][offset] = track
+        self._added(track)
+
+    def __delitem__(self, index: Union[SupportsIndex, slice]) -> None:
+        if isinstance(index, slice):
+            for position in sorted(range(*index.indices(len(self))), reverse=True):
+                self.pop(position)
+            return
+
+        self.pop(index)
+
+    def insert(self, index: SupportsIndex, track: Track) -> None:
+        track = compact(track)
+        position = index.__index__()
+        if position < 0:
+            position = max(position + len(self), 0)
+
+        if self._pending and position >= len(self):
+            self.defer(Cursor([track], track.requester_id))
+            return
+
+        self._fill(position)
+        if not self._chunks:
+            self._chunks.append([track])
+            self._build()
+        elif position >= self._length:
+            if len(self._chunks[-1]) >= self.LOAD:
+                self._chunks.append([track])
+                self._build()
+            else:
+                self._chunks[-1].append(track)
+                self._update(len(self._chunks) - 1, 1)
+        else:
+            chunk, offset = self._locate(position)
+            self._chunks[chunk].insert(offset, track)
+            self._update(chunk, 1)
+
+            if len(self._chunks[chunk]) > self.LOAD * 2:
+                items = self._chunks[chunk]
+                self._chunks[chunk : chunk + 1] = [items[: self.LOAD], items[self.LOAD :]]
+                self._build()
+
+        self._length += 1
+        self._added(track)
+
+    def append(self, track: Track) -> None:
+        self.insert(len(self), track)
+
+    def extend(self, tracks: Iterable[Track]) -> None:
+        if self._pending:
+            self.defer(Cursor(list(tracks)))
+            return
+
+        tracks = [compact(track) for track in tracks]
+        if not tracks:
+            return
+
+        for track in tracks:
+            self._added(track)
+
+        if self._chunks and len(self._chunks[-1]) < self.LOAD:
+            room = self.LOAD - len(self._chunks[-1])
+            self._chunks[-1].extend(tracks[:room])
+            tracks = tracks[room:]
+
+        self._chunks.extend(
+            tracks[index : index + self.LOAD]
+            for index in range(0, len(tracks), self.LOAD)
+        )
+        self._length = sum(len(chunk) for chunk in self._chunks)
+        self._build()
+
+    def pop(self, index: SupportsIndex = -1) -> QueuedTrack:
+        chunk, offset = self._locate(self._normalize(index))
+        track = self._chunks[chunk].pop(offset)
+        self._length -= 1
+        self._removed(track)
+
+        if self._chunks[chunk]:
+            self._update(chunk, -1)
+        else:
+            del self._chunks[chunk]
+            self._build()
+
+        if self._length < self.WINDOW:
+            self._fill(self.WINDOW)
+
+        return track
+
+    def index(self, track: Track) -> int:
+        for position, item in enumerate(self):
+            if item == track:
+                return position
+
+        raise ValueError(f"{track!r} is not in queue")
+
+    def remove(self, track: Track) -> None:
+        self.pop(self.index(track))
+
+    def clear(self) -> None:
+        self._chunks.clear()
+        self._tree = [0]
+        self._length = 0
+        self._pending.clear()
+        self._pending_length = 0
+        self.duration = 0
+        self._requesters.clear()
+
+    def copy(self) -> TrackList:
+        return TrackList(self)
+
+    def footprint(self) -> int:
+        """Approximate number of bytes held by the list and its tracks."""
+
+        size = sys.getsizeof(self._chunks) + sys.getsizeof(self._tree)
+        for chunk in self._chunks:
+            size += sys.getsizeof(chunk) + sum(footprint(track) for track in chunk)
+
+        for cursor in self._pending:
+            size += sys.getsizeof(cursor.tracks) + sum(
+                footprint(track) for track in cursor.peek()
+            )
+
+        return size
+
+    def rearrange(self, tracks: List[QueuedTrack]) -> None:
+        """Replace the order of the tracks with a permutation of themselves.
+
+        The aggregates are unchanged by a permutation, so they are kept as is.
+        Any pending tracks must be part of the permutation, so they are
+        considered materialized afterwards and the requesters of cursors
+        which weren't counted yet are counted now.
+        """
+
+        self._chunks = [
+            tracks[index : index + self.LOAD]
+            for index in range(0, len(tracks), self.LOAD)
+        ]
+        self._length = len(tracks)
+        for cursor in self._pending:
+            if cursor.requester_id is None:
+                self._requesters.update(cursor.requesters())
+
+        self._pending.clear()
+        self._pending_length = 0
+        self._build()
+
+
+class Queue(BaseQueue):
+    """Player queue backed by a `TrackList` for logarithmic positional edits.
+
+    Tracks are stored as `QueuedTrack` records, so `get` and indexing return
+    records which `Player.play` materializes.
+    """
+
+    _items: TrackList  # type: ignore
+
+    def __init__(self, *, history: bool = True) -> None:
+        super().__init__(history=False)
+        self._items = TrackList()
+        self._history: Optional[Queue] = Queue(history=False) if history else None
+
+    @staticmethod
+    def _check_compatibility(item: object) -> bool:
+        if not isinstance(item, (Playable, QueuedTrack)):
+            raise TypeError("This queue is restricted to Playable objects.")
+
+        return True
+
+    @property
+    def history(self) -> Optional[Queue]:
+        return self._history
+
+    @property
+    def duration(self) -> int:
+        """The total length of the queued tracks in milliseconds."""
+
+        return self._items.duration
+
+    @property
+    def requesters(self) -> Counter[int]:
+        """The number of queued tracks per requester ID."""
+
+        return self._items.requesters
+
+    @property
+    def pending(self) -> int:
+        """The number of queued tracks which have not been materialized yet."""
+
+        return self._items.pending
+
+    def put_lazy(self, tracks: Iterable[Track], requester_id: Optional[int] = None) -> int:
+        """Queue tracks without materializing them until they are near the head.
+
+        Returns the number of tracks which were queued.
+        """
+
+        cursor = Cursor(list(tracks), requester_id)
+        count = len(cursor)
+        self._items.defer(cursor)
+        self._wakeup_next()
+        return count
+
+    def move(self, index: int, new_index: int) -> QueuedTrack:
+        """Move the track at an index to a new index and return it."""
+
+        track = self._items.pop(index)
+        self._items.insert(new_index, track)
+        return track
+
+    def shuffle(self) -> None:
+        tracks = list(self._items)
+        random.shuffle(tracks)
+        self._items.rearrange(tracks)
+
+    def footprint(self) -> int:
+        """Approximate number of bytes held by the queue and its history."""
+
+        size = self._items.footprint()
+        if self.history is not None:
+            size += self.history.footprint()
+
+        return size
+
+    def copy(self) -> Queue:
+        queue = Queue(history=self.history is not None)
+        queue._items = self._items.copy()
+        return queue
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from discord.utils import as_chunks
+from wavelink import Node, Playable
+
+from .queue import is_speech
+
+if TYPE_CHECKING:
+    from . import Player
+
+DECODE_BATCH = 100
+
+
+def snapshot(player: Player) -> Optional[Tuple[Any, ...]]:
+    """Capture the state of a player as a `player_sessions` row.
+
+    Tracks are stored as their encoded string alongside the requester,
+    synthesized speech is not worth resuming.
+    """
+
+    if not player.guild or not player.channel or not player.context:
+        return None
+
+    track = player.current
+    if track and is_speech(track):
+        track = None
+
+    queue = [
+        [item.encoded, item.requester_id]
+        for item in player.queue
+        if not is_speech(item)
+    ]
+    if not track and not queue:
+        return None
+
+    return (
+        player.guild.id,
+        player.channel.id,
+        player.context.channel.id,
+        player.context.message.id,
+        player.controller and player.controller.id,
+        player.node.identifier,
+        track and track.encoded,
+        track and (getattr(track.extras, "requester_id", 0) or 0),
+        player.position if track else 0,
+        player.paused,
+        player.volume,
+        player.queue.mode.name,
+        player.synthesize,
+        json.dumps(queue),
+    )
+
+
+async def decode(node: Node, encoded: List[str]) -> List[Playable]:
+    """Decode encoded tracks through Lavalink in batches."""
+
+    tracks: List[Playable] = []
+    for batch in as_chunks(encoded, DECODE_BATCH):
+        payloads: List[Dict[str, Any]] = await node.send(
+            "POST",
+            path="v4/decodetracks",
+            data=batch,
+        )
+        tracks.extend(Playable(payload) for payload in payloads)
+
+    return tracks
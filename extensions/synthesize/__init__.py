@@ -1,11 +1,14 @@
+import asyncio
+import logging
 from contextlib import suppress
 from copy import copy
-from typing import Optional, cast
-from discord import Member, Message
+from typing import Dict, Optional, Union, cast
+from discord import HTTPException, Member, Message
 from discord.ext.commands import (
     Cog,
     Author,
     hybrid_command,
+    hybrid_group,
     cooldown,
     BucketType,
     CooldownMapping,
@@ -13,26 +16,157 @@ from discord.ext.commands import (
 from discord.app_commands import describe, choices, Choice
 from discord.utils import escape_markdown
 from extensions.music import Context as MusicContext, Player
+from extensions.music.player.queue import is_speech
+from config import Speech
+from system.pagination import Paginator
 from wock import Wock, Context
-from start import cache
-from .shared import escape_text, has_excessive_repetition, is_spam, synthesize
-from .shared.constants import replace_slang, SUPPORTED_LANGUAGES, SUPPORTED_ACCENTS
+from .shared import split_text
+from .shared.cache import SpeechCache
+from .shared.engines import SynthesisError
+from .shared.normalize import DEFAULT, Normalizer, fold, is_slang
+from .shared.spam import SpamFilter
+from .shared.utterances import Utterance, UtteranceQueue
+from .shared.constants import SUPPORTED_LANGUAGES, SUPPORTED_ACCENTS
+
+log = logging.getLogger(__name__)
 
 
 class Synthesize(Cog):
     def __init__(self, bot: Wock) -> None:
         self.bot = bot
         self._speak_cooldown = CooldownMapping.from_cooldown(2, 6, BucketType.user)
+        self.speech = SpeechCache(bot.media)
+        self.synthesis = asyncio.Semaphore(Speech.CONCURRENCY)
+        self.normalizers: Dict[int, Normalizer] = {}
+        self.spam = SpamFilter()
+        self.utterances: Dict[int, UtteranceQueue] = {}
+        self.workers: Dict[int, asyncio.Task] = {}
+
+    async def cog_unload(self) -> None:
+        self.speech.close()
+        for worker in self.workers.values():
+            worker.cancel()
 
     async def cog_check(self, ctx: MusicContext) -> None:
         c = await Player.from_context(ctx)
         return not isinstance(c, Message)
 
+    async def normalizer(self, guild_id: int) -> Normalizer:
+        """The normalizer of a guild, compiled with its slang dictionary."""
+
+        if normalizer := self.normalizers.get(guild_id):
+            return normalizer
+
+        query = """
+        SELECT slang, replacement
+        FROM tts_slang
+        WHERE guild_id = $1;
+        """
+        records = await self.bot.pool.fetch(query, guild_id)
+        normalizer = DEFAULT
+        if records:
+            normalizer = DEFAULT.extend(
+                {record["slang"]: record["replacement"] for record in records}
+            )
+
+        self.normalizers[guild_id] = normalizer
+        return normalizer
+
+    async def synthesize(self, text: str, language: str, accent: str) -> str:
+        async with self.synthesis:
+            return await self.speech.get(text, language, accent)
+
+    def enqueue(self, guild_id: int, utterance: Utterance) -> None:
+        queue = self.utterances.get(guild_id)
+        if not queue:
+            queue = self.utterances[guild_id] = UtteranceQueue()
+
+        queue.put(utterance)
+        worker = self.workers.get(guild_id)
+        if not worker or worker.done():
+            self.workers[guild_id] = asyncio.create_task(self.drain(guild_id, queue))
+
+    async def drain(self, guild_id: int, queue: UtteranceQueue) -> None:
+        """Speak the utterances of a guild one after another.
+
+        The next utterance is only synthesized once the previous one has
+        mostly been played, so a busy channel waits in the utterance queue
+        (where stale utterances are dropped) instead of the player's queue.
+        """
+
+        while True:
+            utterance = queue.get_nowait()
+            if not utterance:
+                try:
+                    await asyncio.wait_for(queue.wait(), timeout=Speech.QUEUE_IDLE)
+                except asyncio.TimeoutError:
+                    if not queue:
+                        del self.utterances[guild_id]
+                        del self.workers[guild_id]
+                        return
+
+                continue
+
+            guild = self.bot.get_guild(guild_id)
+            player = cast(Optional[Player], guild and guild.voice_client)
+            if not player or not player.connected:
+                continue
+
+            elif utterance.age > Speech.UTTERANCE_TTL:
+                queue.dropped += 1
+                continue
+
+            try:
+                await self.utter(player, utterance)
+            except Exception:
+                # A failed utterance must not stop the guild's worker.
+                log.exception("Failed to speak an utterance in %s", guild_id)
+
+    async def utter(self, player: Player, utterance: Utterance) -> None:
+        """Synthesize an utterance and queue it on the player."""
+
+        futures = [
+            asyncio.ensure_future(
+                self.synthesize(chunk, utterance.language, utterance.accent)
+            )
+            for chunk in utterance.chunks
+        ]
+        try:
+            await futures[0]
+        except BaseException as exc:
+            for future in futures[1:]:
+                future.cancel()
+
+            if not isinstance(exc, SynthesisError):
+                raise
+
+            elif utterance.context:
+                with suppress(HTTPException):
+                    await utterance.context.warn(
+                        "I wasn't able to synthesize that right now, please try again later"
+                    )
+
+            return
+
+        # The first chunk is ready, the rest are queued as they finish.
+        # A disconnect cancels the utterance but not the worker.
+        await asyncio.wait((player.speak(futures, utterance.user_id),))
+
+        await player.wait_for_speech(Speech.QUEUE_AHEAD)
+
     @Cog.listener("on_message")
     async def speak_channel(self, message: Message):
         """Automatically synthesize text from a voice channel."""
 
-        if message.author.bot or not message.clean_content:
+        if message.author.bot or not message.guild:
+            return
+
+        # Runs for every message the bot sees, anything outside of a
+        # synthesizing voice channel is dropped before building a context.
+        if not self.bot.voice.is_synthesizing(message.guild.id, message.channel.id):
+            return
+
+        if not message.clean_content:
             return
 
         ctx = cast(Optional[MusicContext], await self.bot.get_context(message))
@@ -42,9 +176,6 @@ class Synthesize(Cog):
         if not ctx.voice_client or message.channel != ctx.voice_client.channel:
             return
 
-        if not ctx.voice_client.synthesize:
-            return
-
         bucket = self._speak_cooldown.get_bucket(message)
         retry_after = bucket.update_rate_limit()
         if retry_after:
@@ -61,15 +192,20 @@ class Synthesize(Cog):
         if from_event:
             text = text[2:]
 
-        text = escape_text(replace_slang(text))
-        if is_spam(text):
+        # Punctuation is stripped when normalizing, so the sentence and
+        # clause boundaries are found beforehand.
+        normalizer = await self.normalizer(ctx.guild.id)
+        chunks = split_text(text, Speech.CHUNK_SIZE)
+        chunks = [chunk for chunk in map(normalizer.normalize, chunks) if chunk]
+        text = " ".join(chunks)
+        if self.spam.check(ctx.author.id, text):
             return await ctx.reply("fuck off idiot")
         
         elif not text:
             return
 
         track = ctx.voice_client.current
-        if ctx.voice_client.playing and track and track.source != "local":
+        if ctx.voice_client.playing and track and not is_speech(track):
             if from_event:
                 return
 
@@ -78,13 +214,7 @@ class Synthesize(Cog):
                 "-# tip: *Only one user can use this wock at a time*"
             )
 
-        command = self.bot.get_command("play")
-        if not command:
-            return await ctx.warn(
-                "This command isn't available right now, please try again later"
-            )
-
-        elif await self.bot.is_blacklisted([ctx.author.id]):
+        if await self.bot.is_blacklisted([ctx.author.id]):
             return
 
         query = """
@@ -98,11 +228,17 @@ class Synthesize(Cog):
         if record:
             language, accent = record["language"], record["accent"]
 
-        buffer = await synthesize(text, language, accent)
-        file = cache / f"tts{ctx.author.id}.mp3"
-        await file.write_bytes(buffer.getbuffer())
-
-        await command(ctx, query=f"tts:{file.name}")
+        self.enqueue(
+            ctx.guild.id,
+            Utterance(
+                ctx.author.id,
+                chunks,
+                language,
+                accent,
+                context=None if from_event else ctx,
+            ),
+        )
+        ctx.voice_client.synthesize = True
         if from_event:
             return await ctx.message.add_reaction("🗣")
 
@@ -207,6 +343,103 @@ class Synthesize(Cog):
             "\n-# *You can use `/dialect reset` to reset your [preferences](<https://wock.app>)*"
         )
 
+    @hybrid_group(invoke_without_command=True)
+    async def slang(self, ctx: Context) -> Union[Message, Paginator]:
+        """View the slang this server expands when synthesizing text."""
+
+        query = """
+        SELECT slang, replacement
+        FROM tts_slang
+        WHERE guild_id = $1
+        ORDER BY slang;
+        """
+        records = await self.bot.pool.fetch(query, ctx.guild.id)
+        if not records:
+            return await ctx.warn(
+                "This server hasn't added any **slang** yet\n"
+                "-# tip: *You can add slang with [/slang add](https://wock.app)*"
+            )
+
+        return await Paginator(
+            ctx=ctx,
+            entries=[
+                f"`{record['slang']}` → {escape_markdown(record['replacement'])}"
+                for record in records
+            ],
+            embed=ctx.create(
+                title="Slang",
+                footer={"text": f"{len(records)} of {Speech.SLANG_LIMIT} entries"},
+            )["embed"],
+        )
+
+    @slang.command(name="add")
+    @describe(
+        slang="The word to replace",
+        replacement="What it should be read as",
+    )
+    async def slang_add(self, ctx: Context, slang: str, *, replacement: str) -> Message:
+        """Add slang which is expanded when synthesizing text."""
+
+        if not ctx.author.guild_permissions.manage_guild:
+            return await ctx.warn("You need the **Manage Server** permission to add slang")
+
+        slang = fold(slang)
+        if not is_slang(slang):
+            return await ctx.warn("Slang has to be a single word of up to 32 characters")
+
+        elif len(replacement) > Speech.SLANG_LENGTH:
+            return await ctx.warn(
+                f"The replacement can't be longer than {Speech.SLANG_LENGTH} characters"
+            )
+
+        query = """
+        SELECT COUNT(*)
+        FROM tts_slang
+        WHERE guild_id = $1
+        AND slang != $2;
+        """
+        if await self.bot.pool.fetchval(query, ctx.guild.id, slang) >= Speech.SLANG_LIMIT:
+            return await ctx.warn(
+                f"This server can't have more than {Speech.SLANG_LIMIT} slang entries"
+            )
+
+        query = """
+        INSERT INTO tts_slang (
+            guild_id,
+            slang,
+            replacement
+        ) VALUES ($1, $2, $3)
+        ON CONFLICT (guild_id, slang)
+        DO UPDATE SET
+            replacement = EXCLUDED.replacement;
+        """
+        await self.bot.pool.execute(query, ctx.guild.id, slang, replacement)
+        self.normalizers.pop(ctx.guild.id, None)
+
+        return await ctx.approve(
+            f"`{slang}` will now be read as **{escape_markdown(replacement)}**"
+        )
+
+    @slang.command(name="remove", aliases=("delete",))
+    @describe(slang="The word to stop replacing")
+    async def slang_remove(self, ctx: Context, slang: str) -> Message:
+        """Remove slang added to this server."""
+
+        if not ctx.author.guild_permissions.manage_guild:
+            return await ctx.warn("You need the **Manage Server** permission to remove slang")
+
+        query = """
+        DELETE FROM tts_slang
+        WHERE guild_id = $1
+        AND slang = $2;
+        """
+        result = await self.bot.pool.execute(query, ctx.guild.id, fold(slang))
+        if result == "DELETE 0":
+            return await ctx.warn(f"`{slang}` isn't slang in this server")
+
+        self.normalizers.pop(ctx.guild.id, None)
+        return await ctx.approve(f"`{slang}` will no longer be replaced")
+
 
 async def setup(bot: Wock) -> None:
     await bot.add_cog(Synthesize(bot))
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+
+from config import Speech
+from system.media import MediaStore
+
+from .engines import Engine, SynthesisError, candidates
+
+log = logging.getLogger(__name__)
+
+
+def speech_key(text: str, language: str, accent: str, engine: str) -> str:
+    """Hash normalized text, voice and engine into the name of its audio."""
+
+    normalized = " ".join(text.casefold().split())
+    return hashlib.sha256(
+        f"{engine}\0{language}\0{accent}\0{normalized}".encode()
+    ).hexdigest()
+
+
+class SpeechCache:
+    """Cache of synthesized speech keyed by text, language, accent and engine.
+
+    Hot phrases are kept in an in-memory LRU bounded by `Speech.MEMORY_BUDGET`
+    bytes, which Lavalink streams from the media server's speech route, so
+    nothing touches the disk before playback. Every phrase is also written
+    to the media store in the background, which keeps it across restarts
+    under its own disk budget.
+    """
+
+    def __init__(self, media: MediaStore) -> None:
+        self.media = media
+        self.entries: OrderedDict[str, bytes] = OrderedDict()
+        self.size = 0
+        self.pending: Dict[str, asyncio.Task[str]] = {}
+        self.writes: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        media.register(self.lookup)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / total if total else 0.0
+
+    def close(self) -> None:
+        self.media.unregister(self.lookup)
+
+    def lookup(self, name: str) -> Optional[bytes]:
+        if audio := self.entries.get(name):
+            self.entries.move_to_end(name)
+
+        return audio
+
+    def remember(self, name: str, audio: bytes) -> None:
+        if name in self.entries:
+            self.entries.move_to_end(name)
+            return
+
+        self.entries[name] = audio
+        self.size += len(audio)
+        while self.size > Speech.MEMORY_BUDGET and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def persist(self, audio: bytes, suffix: str, key: str) -> None:
+        """Write audio to the media store without holding up playback."""
+
+        async def write() -> None:
+            try:
+                await self.media.put(audio, suffix, digest=key)
+            except OSError as exc:
+                log.warning("Failed to persist synthesized speech %s: %s", key, exc)
+
+        task = asyncio.create_task(write())
+        self.writes.add(task)
+        task.add_done_callback(self.writes.discard)
+
+    async def get(self, text: str, language: str = "en", accent: str = "us") -> str:
+        """Return the media name of the spoken text, synthesizing it on a miss.
+
+        The engines for the language are tried in order of preference.
+
+        Raises:
+            SynthesisError: No engine was able to synthesize the text.
+        """
+
+        error: Optional[SynthesisError] = None
+        for engine in candidates(language):
+            try:
+                return await self.fetch(engine, text, language, accent)
+            except SynthesisError as exc:
+                log.warning("Engine %s failed to synthesize: %s", engine.name, exc)
+                error = exc
+
+        raise error or SynthesisError(f"No engine is able to speak {language!r}")
+
+    async def fetch(self, engine: Engine, text: str, language: str, accent: str) -> str:
+        key = speech_key(text, language, accent, engine.name)
+        name = f"{key}{engine.suffix}"
+        if name in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(name)
+            return name
+
+        if name in self.media:
+            self.disk_hits += 1
+            self.media.touch(name)
+            return name
+
+        # Synthesis runs in a task shared by every caller, so one of them being
+        # cancelled, like a guild skipping its speech, leaves the others be.
+        task = self.pending.get(key)
+        if task is None:
+            task = asyncio.create_task(self.synthesize(engine, text, language, accent, key))
+            self.pending[key] = task
+            task.add_done_callback(lambda _: self.settle(key))
+        else:
+            self.hits += 1
+
+        return await asyncio.shield(task)
+
+    async def synthesize(
+        self,
+        engine: Engine,
+        text: str,
+        language: str,
+        accent: str,
+        key: str,
+    ) -> str:
+        name = f"{key}{engine.suffix}"
+        audio = await engine.synthesize(text, language, accent)
+        self.misses += 1
+        self.remember(name, audio)
+        self.persist(audio, engine.suffix, key)
+        return name
+
+    def settle(self, key: str) -> None:
+        task = self.pending.pop(key)
+        # Only callers should see the exception, not the event loop.
+        if not task.cancelled():
+            task.exception()
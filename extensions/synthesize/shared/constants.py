@@ -1,15 +1,3 @@
-import re
-
-
-def replace_slang(text: str) -> str:
-    sorted_slang = sorted(SLANG_REPLACEMENT.items(), key=lambda x: len(x[0]), reverse=True)
-    
-    for slang, replacement in sorted_slang:
-        pattern = rf'\b{re.escape(slang)}\b'
-        text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
-    
-    return text
-
 SLANG_REPLACEMENT = {
     "rn": "right now",
     "fr": "for real",
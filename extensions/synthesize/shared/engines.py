@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import shutil
+from abc import ABC, abstractmethod
+from statistics import mean, quantiles
+from time import perf_counter
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from config import Speech
+
+from . import synthesize
+
+log = logging.getLogger(__name__)
+
+BENCHMARK_PHRASES = (
+    "hi",
+    "lol",
+    "good morning everyone",
+    "can you skip this song",
+    "i don't know what you are talking about right now",
+    "that was the best round we have played all week, for real",
+)
+
+
+class SynthesisError(Exception):
+    """Raised when an engine is unable to synthesize text."""
+
+
+class Engine(ABC):
+    """A text to speech backend.
+
+    Engines return encoded audio which Lavalink can play directly, `suffix`
+    being the extension of that format.
+    """
+
+    name: str
+    suffix: str
+    languages: Optional[frozenset[str]] = None
+
+    def available(self) -> bool:
+        return True
+
+    def supports(self, language: str) -> bool:
+        return self.languages is None or language in self.languages
+
+    @abstractmethod
+    async def synthesize(self, text: str, language: str, accent: str) -> bytes:
+        """Synthesize text into encoded audio.
+
+        Raises:
+            SynthesisError: The text couldn't be synthesized.
+        """
+
+
+class GoogleEngine(Engine):
+    """gTTS, which round trips to Google Translate for every utterance."""
+
+    name = "google"
+    suffix = ".mp3"
+
+    async def synthesize(self, text: str, language: str, accent: str) -> bytes:
+        try:
+            buffer = await synthesize(text, language, accent)
+        except Exception as exc:
+            raise SynthesisError(str(exc)) from exc
+
+        return buffer.getvalue()
+
+
+class EspeakEngine(Engine):
+    """eSpeak NG running locally, which needs no network at all."""
+
+    name = "espeak"
+    suffix = ".wav"
+    languages = frozenset(
+        (
+            "en", "es", "fr", "de", "it", "pt", "ru", "ja", "ko", "zh",
+            "ar", "pl", "nl", "tr", "sv", "fi", "no", "da", "cs", "el",
+        )
+    )
+    VOICES = {"zh": "cmn", "no": "nb"}
+    ACCENTS = {
+        ("en", "us"): "en-us",
+        ("en", "uk"): "en-gb",
+        ("pt", "br"): "pt-br",
+        ("es", "mx"): "es-419",
+    }
+
+    def __init__(self) -> None:
+        self.binary = shutil.which("espeak-ng") or shutil.which("espeak")
+
+    def available(self) -> bool:
+        return self.binary is not None
+
+    def voice(self, language: str, accent: str) -> str:
+        return self.ACCENTS.get((language, accent)) or self.VOICES.get(language, language)
+
+    async def synthesize(self, text: str, language: str, accent: str) -> bytes:
+        if not self.binary:
+            raise SynthesisError("eSpeak is not installed")
+
+        # The text is passed through stdin so it is never parsed as options.
+        process = await asyncio.create_subprocess_exec(
+            self.binary,
+            "-v",
+            self.voice(language, accent),
+            "--stdout",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            audio, error = await asyncio.wait_for(
+                process.communicate(text.encode()),
+                timeout=Speech.ENGINE_TIMEOUT,
+            )
+        except asyncio.TimeoutError as exc:
+            process.kill()
+            raise SynthesisError("eSpeak timed out") from exc
+
+        if process.returncode or not audio:
+            raise SynthesisError(error.decode(errors="replace").strip() or "eSpeak failed")
+
+        return audio
+
+
+ENGINES: Dict[str, Engine] = {
+    engine.name: engine for engine in (GoogleEngine(), EspeakEngine())
+}
+
+
+def candidates(language: str) -> List[Engine]:
+    """The available engines for a language, in order of preference."""
+
+    order = Speech.LANGUAGE_ENGINES.get(language, Speech.ENGINES)
+    return [
+        engine
+        for name in order
+        if (engine := ENGINES.get(name)) and engine.available() and engine.supports(language)
+    ]
+
+
+class BenchmarkResult(NamedTuple):
+    engine: str
+    phrases: int
+    failures: int
+    latency: float
+    p95: float
+    throughput: float
+    size: int
+
+
+async def benchmark(
+    engine: Engine,
+    phrases: Sequence[str] = BENCHMARK_PHRASES,
+    *,
+    language: str = "en",
+    accent: str = "us",
+    concurrency: int = 4,
+) -> BenchmarkResult:
+    """Measure the latency of each phrase and the throughput of a batch.
+
+    Latency is measured one phrase at a time, throughput by synthesizing the
+    whole set with `concurrency` requests in flight.
+    """
+
+    latencies: List[float] = []
+    failures = 0
+    size = 0
+    for phrase in phrases:
+        started = perf_counter()
+        try:
+            audio = await engine.synthesize(phrase, language, accent)
+        except SynthesisError:
+            failures += 1
+            continue
+
+        latencies.append(perf_counter() - started)
+        size += len(audio)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(phrase: str) -> None:
+        async with semaphore:
+            await engine.synthesize(phrase, language, accent)
+
+    started = perf_counter()
+    await asyncio.gather(*(run(phrase) for phrase in phrases), return_exceptions=True)
+    elapsed = perf_counter() - started
+
+    return BenchmarkResult(
+        engine.name,
+        len(phrases),
+        failures,
+        mean(latencies) if latencies else 0.0,
+        quantiles(latencies, n=20)[-1] if len(latencies) > 1 else sum(latencies),
+        len(phrases) / elapsed if elapsed else 0.0,
+        size,
+    )
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, Iterable, Mapping
+
+from .constants import SLANG_REPLACEMENT
+
+URL = r"https?://\S+"
+EMOJI = r"<a?:\w+:\d+>"
+PUNCTUATION = re.compile(r"[^\w\s]+")
+WORD = re.compile(r"^\w{1,32}$")
+
+
+def fold(text: str) -> str:
+    """The case folding slang keys are stored and looked up with."""
+
+    return text.casefold()
+
+
+def trie_pattern(words: Iterable[str]) -> str:
+    """Build an alternation of words which shares their common prefixes.
+
+    A flat `a|b|c` alternation makes the regex engine retry every word at
+    each position, branching on a trie only tries the words which can still
+    match.
+    """
+
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        optional = "" in node
+        branches = [
+            re.escape(char) + build(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if not branches:
+            return ""
+
+        if len(branches) == 1 and not optional:
+            return branches[0]
+
+        pattern = f"(?:{'|'.join(branches)})"
+        return f"{pattern}?" if optional else pattern
+
+    return build(trie)
+
+
+class Normalizer:
+    """Compiled text normalization for speech.
+
+    Slang expansion and the removal of URLs, custom emojis and punctuation
+    happen in a single scan of the text, with the slang dictionary compiled
+    into one alternation once instead of one pattern per entry per call.
+    """
+
+    __slots__ = ("replacements", "pattern")
+
+    def __init__(self, replacements: Mapping[str, str]) -> None:
+        # Expansions are escaped up front since punctuation is stripped
+        # from everything else in the same pass.
+        self.replacements = {
+            fold(slang): " ".join(PUNCTUATION.sub("", replacement).split())
+            for slang, replacement in replacements.items()
+        }
+
+        alternatives = [f"(?P<drop>{URL}|{EMOJI})"]
+        if self.replacements:
+            alternatives.append(rf"\b(?P<slang>{trie_pattern(self.replacements)})\b")
+
+        alternatives.append(r"[^\w\s]+")
+        self.pattern = re.compile("|".join(alternatives), re.IGNORECASE)
+
+    def __len__(self) -> int:
+        return len(self.replacements)
+
+    def extend(self, replacements: Mapping[str, str]) -> Normalizer:
+        """A normalizer with extra entries, which take precedence over these."""
+
+        return Normalizer({**self.replacements, **replacements})
+
+    def replace(self, match: re.Match[str]) -> str:
+        if match.lastgroup == "slang":
+            slang = match.group("slang")
+            # IGNORECASE also matches letters like "İ" whose case folding isn't
+            # the key's, those are spoken as they were written.
+            return self.replacements.get(fold(slang), slang)
+
+        return ""
+
+    def normalize(self, text: str) -> str:
+        return " ".join(self.pattern.sub(self.replace, text).split())
+
+
+DEFAULT = Normalizer(SLANG_REPLACEMENT)
+PLAIN = Normalizer({})
+
+
+def is_slang(word: str) -> bool:
+    """Whether a word can be used as a key of a slang dictionary."""
+
+    return bool(WORD.match(word))
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+from collections import Counter, deque
+from time import monotonic
+from typing import Deque, Dict, NamedTuple, Tuple
+
+from config import Speech
+
+from .normalize import PLAIN
+
+VOWELS = frozenset("aeiou")
+CONSONANTS = frozenset("bcdfghjklmnpqrstvwxz")
+
+
+def is_scrambled_text(text: str, min_length: int = 8) -> bool:
+    """Detect scrambled or nonsense words from their letters in one pass."""
+
+    text = text.lower().strip()
+    if len(text) < min_length:
+        return False
+
+    letters = vowels = consonants = 0
+    vowel_run = consonant_run = 0
+    clustered = False
+    for char in text:
+        if char in VOWELS:
+            vowels += 1
+            vowel_run += 1
+            consonant_run = 0
+        elif char in CONSONANTS:
+            consonants += 1
+            consonant_run += 1
+            vowel_run = 0
+        else:
+            vowel_run = consonant_run = 0
+
+        if char.isalpha():
+            letters += 1
+
+        if vowel_run >= 3 or consonant_run >= 3:
+            clustered = True
+
+    if not letters or not vowels or not consonants:
+        return True
+
+    ratio = vowels / consonants
+    return (
+        ratio < 0.25
+        or ratio > 0.75
+        or clustered
+        or len(set(text)) / len(text) > 0.8
+    )
+
+
+class Features(NamedTuple):
+    words: int
+    unique: int
+    scrambled: int
+    longest: int
+    single: int
+    repeats: int
+    tripled: bool
+    keys: Counter[str]
+
+    def excessive(self, max_repeats: int = 4, max_length: int = 100) -> bool:
+        return (
+            self.scrambled >= 2
+            or self.longest > 15
+            or self.single >= 3
+            or self.words > max_length
+            or self.repeats >= max_repeats
+            or self.tripled
+        )
+
+    @property
+    def spam(self) -> bool:
+        return self.excessive() or self.unique < self.words / 2
+
+
+def word_key(word: str) -> str:
+    """A lowercased word without the characters which aren't alphanumeric."""
+
+    return word if word.isalnum() else "".join(filter(str.isalnum, word))
+
+
+def features(text: str) -> Features:
+    """Compute every spam feature of a message in linear time."""
+
+    words = text.split()
+    lowered = text.lower().strip()
+    counts: Counter[str] = Counter()
+    scrambled = longest = single = repeats = 0
+    for word in lowered.split():
+        length = len(word)
+        longest = max(longest, length)
+        if length == 1:
+            single += 1
+
+        if is_scrambled_text(word):
+            scrambled += 1
+
+        if key := word_key(word):
+            counts[key] += 1
+            repeats = max(repeats, counts[key])
+
+    # Three of the same character in a row, ignoring spaces between words.
+    tripled = False
+    previous = ""
+    run = 0
+    for char in lowered:
+        if char == " ":
+            continue
+
+        run = run + 1 if char == previous else 1
+        previous = char
+        if run >= 3:
+            tripled = True
+            break
+
+    return Features(
+        len(words),
+        len(set(words)),
+        scrambled,
+        longest,
+        single,
+        repeats,
+        tripled,
+        counts,
+    )
+
+
+def has_excessive_repetition(text: str, max_repeats: int = 4, max_length: int = 100) -> bool:
+    """Detect spam patterns within a single message."""
+
+    return features(text).excessive(max_repeats, max_length)
+
+
+def is_spam(text: str) -> bool:
+    """Main spam detection function combining all checks."""
+
+    cleaned_text = PLAIN.normalize(text)
+    if not cleaned_text or len(cleaned_text) < 4:
+        return False
+
+    return features(cleaned_text).spam
+
+
+Entry = Tuple[float, str, Counter]
+
+
+class SpamFilter:
+    """Spam detection which also remembers each user's recent messages.
+
+    A message is spam on its own by `is_spam`, or when the rolling window
+    of the author's last `Speech.SPAM_WINDOW` messages shows the same
+    message being repeated or one word making up most of what they said.
+    """
+
+    def __init__(self) -> None:
+        self.windows: Dict[int, Deque[Entry]] = {}
+        self.totals: Dict[int, Counter[str]] = {}
+
+    def expire(self, user_id: int, now: float) -> None:
+        window = self.windows[user_id]
+        totals = self.totals[user_id]
+        while window and (
+            len(window) >= Speech.SPAM_WINDOW or now - window[0][0] > Speech.SPAM_TTL
+        ):
+            _, _, keys = window.popleft()
+            totals.subtract(keys)
+
+        # Keep the counter from collecting every word ever sent.
+        for key in [key for key, count in totals.items() if count <= 0]:
+            del totals[key]
+
+    def prune(self, now: float) -> None:
+        for user_id in [
+            user_id
+            for user_id, window in self.windows.items()
+            if not window or now - window[-1][0] > Speech.SPAM_TTL
+        ]:
+            del self.windows[user_id]
+            del self.totals[user_id]
+
+    def check(self, user_id: int, text: str) -> bool:
+        """Classify a normalized message and add it to the author's window."""
+
+        if not text or len(text) < 4:
+            return False
+
+        now = monotonic()
+        if len(self.windows) > Speech.SPAM_USERS:
+            self.prune(now)
+
+        if user_id not in self.windows:
+            self.windows[user_id] = deque()
+            self.totals[user_id] = Counter()
+
+        self.expire(user_id, now)
+        window = self.windows[user_id]
+        totals = self.totals[user_id]
+
+        result = features(text)
+        lowered = text.lower()
+        duplicates = sum(1 for _, previous, _ in window if previous == lowered)
+        window.append((now, lowered, result.keys))
+        totals.update(result.keys)
+
+        if result.spam:
+            return True
+
+        if duplicates + 1 >= Speech.SPAM_DUPLICATES:
+            return True
+
+        words = sum(totals.values())
+        if words < Speech.SPAM_REPEATS:
+            return False
+
+        count = max(totals.values())
+        return count >= Speech.SPAM_REPEATS and count / words >= Speech.SPAM_SHARE
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict, deque
+from time import monotonic
+from typing import TYPE_CHECKING, Deque, List, Optional
+
+from config import Speech
+
+if TYPE_CHECKING:
+    from extensions.music import Context
+
+
+class Utterance:
+    """Normalized text waiting to be spoken for a user."""
+
+    __slots__ = ("user_id", "chunks", "language", "accent", "context", "created_at")
+
+    def __init__(
+        self,
+        user_id: int,
+        chunks: List[str],
+        language: str,
+        accent: str,
+        context: Optional[Context] = None,
+    ) -> None:
+        self.user_id = user_id
+        self.chunks = chunks
+        self.language = language
+        self.accent = accent
+        self.context = context
+        self.created_at = monotonic()
+
+    @property
+    def short(self) -> bool:
+        return len(self.chunks) == 1
+
+    @property
+    def age(self) -> float:
+        return monotonic() - self.created_at
+
+    def mergeable(self, other: Utterance) -> bool:
+        return (
+            self.short
+            and other.short
+            and (self.language, self.accent) == (other.language, other.accent)
+            and len(self.chunks[0]) + len(other.chunks[0]) < Speech.CHUNK_SIZE
+        )
+
+    def merge(self, other: Utterance) -> None:
+        self.chunks = [f"{self.chunks[0]} {other.chunks[0]}"]
+        self.context = self.context or other.context
+
+
+class UtteranceQueue:
+    """Per-guild queue of utterances, taken round robin across speakers.
+
+    Each speaker has their own FIFO and speakers take turns, so one chatty
+    user can't starve everybody else. Once `depth` utterances are waiting
+    the stalest one is dropped, and consecutive short utterances of a
+    speaker are merged so they're synthesized with a single call.
+    """
+
+    def __init__(self, depth: int = Speech.QUEUE_DEPTH) -> None:
+        self.depth = depth
+        self.speakers: OrderedDict[int, Deque[Utterance]] = OrderedDict()
+        self.size = 0
+        self.dropped = 0
+        self.merged = 0
+        self.event = asyncio.Event()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def put(self, utterance: Utterance) -> None:
+        pending = self.speakers.get(utterance.user_id)
+        if pending is None:
+            pending = self.speakers[utterance.user_id] = deque()
+
+        pending.append(utterance)
+        self.size += 1
+        while self.size > self.depth:
+            self.drop_stalest()
+
+        self.event.set()
+
+    def drop_stalest(self) -> None:
+        # Every speaker's FIFO is oldest first, so only the heads are compared.
+        user_id = min(self.speakers, key=lambda key: self.speakers[key][0].created_at)
+        pending = self.speakers[user_id]
+        pending.popleft()
+        if not pending:
+            del self.speakers[user_id]
+
+        self.size -= 1
+        self.dropped += 1
+
+    def get_nowait(self) -> Optional[Utterance]:
+        if not self.speakers:
+            return None
+
+        user_id, pending = self.speakers.popitem(last=False)
+        utterance = pending.popleft()
+        self.size -= 1
+        while pending and utterance.mergeable(pending[0]):
+            utterance.merge(pending.popleft())
+            self.size -= 1
+            self.merged += 1
+
+        if pending:
+            # Back of the line until every other speaker had a turn.
+            self.speakers[user_id] = pending
+
+        return utterance
+
+    async def wait(self) -> None:
+        while not self.speakers:
+            self.event.clear()
+            await self.event.wait()
@@ -1,6 +1,4 @@
 import asyncio
-import shutil
-from anyio import Path
 import asyncpg
 import logging
 
@@ -11,12 +9,6 @@ from rich.logging import RichHandler
 
 load_dotenv(verbose=True)
 
-cache = Path("/tmp/wock")
-
-async def clear_cache():
-    shutil.rmtree(cache, ignore_errors=True)
-    await cache.mkdir(exist_ok=True)
-    
 def setup_logging():
     """Setup logging for the bot by adding an intercept handler which will intercept standard logging messages
     and redirect them to the loguru logging.
@@ -73,7 +65,6 @@ async def initialize_database() -> asyncpg.Pool:
 
 
 async def main():
-    await clear_cache()
     async with Wock() as bot:
         bot.pool = await initialize_database()
         await write_schema_to_database(bot.pool)
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import asyncio
+import csv
+import logging
+from io import BytesIO, StringIO
+from time import monotonic
+from typing import TYPE_CHECKING, Collection, Dict, List, Optional, Sequence, Tuple
+
+from aiohttp import ClientError
+from discord import Forbidden, Guild, HTTPException, NotFound
+
+from config import Blacklist
+
+if TYPE_CHECKING:
+    from asyncpg import Connection
+
+    from wock import Wock
+
+log = logging.getLogger(__name__)
+
+Entry = Tuple[int, Optional[str]]
+MAX_ID = 2**63 - 1
+
+
+def parse_entries(text: str) -> Tuple[List[Entry], int]:
+    """Read target IDs and their optional reasons from a CSV export or a list.
+
+    Every line is an ID followed by a comma or whitespace and the reason.
+    Blank lines, comments and a header are skipped, the first reason of a
+    repeated ID is kept. Returns the entries and how many lines were invalid.
+    """
+
+    entries: Dict[int, Optional[str]] = {}
+    invalid = 0
+    for line, row in enumerate(csv.reader(StringIO(text))):
+        if not row or not row[0].strip() or row[0].lstrip().startswith("#"):
+            continue
+
+        if len(row) == 1:
+            # Any run of whitespace separates the reason, tabs included.
+            target, *rest = row[0].split(None, 1)
+            reason = rest[0] if rest else ""
+        else:
+            target, reason = row[0].strip(), row[1]
+
+        if line == 0 and target == "target_id":
+            continue
+
+        # `isdigit` alone accepts digits like "²" which `int` refuses.
+        if not (target.isascii() and target.isdigit() and 0 < int(target) <= MAX_ID):
+            invalid += 1
+            continue
+
+        entries.setdefault(int(target), reason.strip()[: Blacklist.REASON_LENGTH] or None)
+
+    return list(entries.items()), invalid
+
+
+async def import_entries(connection: Connection, entries: Sequence[Entry]) -> List[int]:
+    """Blacklist every entry with COPY and return the newly added targets.
+
+    Must be called within a transaction, the staging table is dropped on commit.
+    """
+
+    await connection.execute(
+        """
+        CREATE TEMPORARY TABLE blacklist_import (
+            target_id BIGINT NOT NULL,
+            reason TEXT
+        ) ON COMMIT DROP
+        """
+    )
+    await connection.copy_records_to_table(
+        "blacklist_import",
+        records=entries,
+        columns=("target_id", "reason"),
+    )
+    records = await connection.fetch(
+        """
+        INSERT INTO blacklist (target_id, reason)
+        SELECT target_id, reason FROM blacklist_import
+        ON CONFLICT (target_id) DO NOTHING
+        RETURNING target_id
+        """
+    )
+    return [record["target_id"] for record in records]
+
+
+async def export_entries(connection: Connection) -> BytesIO:
+    """The blacklist as CSV, in the format `parse_entries` reads back."""
+
+    buffer = BytesIO()
+    await connection.copy_from_query(
+        "SELECT target_id, reason, created_at FROM blacklist ORDER BY created_at",
+        output=buffer,
+        format="csv",
+        header=True,
+    )
+    buffer.seek(0)
+    return buffer
+
+
+def affected_guilds(bot: Wock, target_ids: Collection[int]) -> List[Guild]:
+    """The guilds which are blacklisted or owned by a blacklisted user."""
+
+    return [
+        guild
+        for guild in bot.guilds
+        if guild.id in target_ids or guild.owner_id in target_ids
+    ]
+
+
+class Departures:
+    """Leave guilds concurrently without tripping Discord's rate limits.
+
+    At most `Blacklist.DEPARTURE_CONCURRENCY` requests are in flight and
+    they're started no faster than `Blacklist.DEPARTURE_RATE` per second,
+    well under the global limit. Guilds the bot already left count as left,
+    other failures, including connection errors, are retried after the
+    rate limit they ran into.
+    """
+
+    def __init__(self, guilds: Sequence[Guild]) -> None:
+        self.guilds = guilds
+        self.left = 0
+        self.failed = 0
+        self.semaphore = asyncio.Semaphore(Blacklist.DEPARTURE_CONCURRENCY)
+        self.lock = asyncio.Lock()
+        self.next_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self.guilds)
+
+    @property
+    def done(self) -> int:
+        return self.left + self.failed
+
+    async def pace(self) -> None:
+        async with self.lock:
+            now = monotonic()
+            delay = self.next_at - now
+            self.next_at = max(self.next_at, now) + 1 / Blacklist.DEPARTURE_RATE
+
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def leave(self, guild: Guild) -> None:
+        for attempt in range(Blacklist.DEPARTURE_ATTEMPTS):
+            # Retries back off without holding on to a slot.
+            async with self.semaphore:
+                await self.pace()
+                try:
+                    await guild.leave()
+                except (NotFound, Forbidden):
+                    break
+                except (HTTPException, ClientError, asyncio.TimeoutError) as exc:
+                    error = exc
+                else:
+                    break
+
+            if attempt + 1 < Blacklist.DEPARTURE_ATTEMPTS:
+                await asyncio.sleep(getattr(error, "retry_after", None) or 2**attempt)
+        else:
+            log.warning("Failed to leave %s: %s", guild.id, error)
+            self.failed += 1
+            return
+
+        self.left += 1
+
+    async def run(self) -> Departures:
+        await asyncio.gather(*(self.leave(guild) for guild in self.guilds))
+        return self
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right, insort
+from time import monotonic
+from typing import TYPE_CHECKING, Dict, Iterator, List, Literal, Optional, Set, Tuple
+
+from discord import Guild
+
+if TYPE_CHECKING:
+    from wock import Wock
+
+Sort = Literal["players", "members", "name"]
+
+
+class GuildEntry:
+    """The searchable fields of a guild, case folded once when indexed."""
+
+    __slots__ = ("id", "name", "owner_id", "owner", "keys")
+
+    def __init__(self, guild: Guild) -> None:
+        self.id = guild.id
+        self.name = guild.name.casefold()
+        self.owner_id = guild.owner_id or 0
+        self.owner = str(guild.owner).casefold() if guild.owner else ""
+        self.keys: Tuple[Tuple[str, int], ...] = tuple(
+            (key, self.id)
+            for key in (self.name, str(self.id), self.owner, str(self.owner_id))
+            if key
+        )
+
+    @property
+    def text(self) -> str:
+        return "\n".join(key for key, _ in self.keys)
+
+
+class GuildIndex:
+    """Searchable index of the guilds the bot is in.
+
+    Names, IDs and owners are kept in one sorted list so prefix searches
+    are a bisect, while substring searches run `str.find` over a corpus of
+    every entry's keys, which is rebuilt on the first search after a change.
+    Member counts change all the time, so the ranking by members is cached
+    for a minute instead of being kept sorted. The index is kept current
+    from guild join, leave and update events, and whether a guild has an
+    active player comes from the voice registry.
+    """
+
+    ORDER_TTL = 60
+
+    def __init__(self, bot: Wock) -> None:
+        self.bot = bot
+        self.orders: Dict[str, Tuple[float, Dict[int, int]]] = {}
+        self.entries: Dict[int, GuildEntry] = {}
+        self.keys: List[Tuple[str, int]] = []
+        self.corpus: Optional[Tuple[str, List[int], List[int]]] = None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, guild: Guild) -> None:
+        self.discard(guild.id)
+        entry = self.entries[guild.id] = GuildEntry(guild)
+        for key in entry.keys:
+            insort(self.keys, key)
+
+        self.corpus = None
+        self.orders.clear()
+
+    def discard(self, guild_id: int) -> None:
+        entry = self.entries.pop(guild_id, None)
+        if not entry:
+            return
+
+        for key in entry.keys:
+            index = bisect_left(self.keys, key)
+            if index < len(self.keys) and self.keys[index] == key:
+                del self.keys[index]
+
+        self.corpus = None
+        self.orders.clear()
+
+    def rebuild(self) -> None:
+        self.entries = {guild.id: GuildEntry(guild) for guild in self.bot.guilds}
+        self.keys = sorted(key for entry in self.entries.values() for key in entry.keys)
+        self.corpus = None
+        self.orders.clear()
+
+    def prefixed(self, query: str) -> Iterator[int]:
+        index = bisect_left(self.keys, (query, 0))
+        while index < len(self.keys) and self.keys[index][0].startswith(query):
+            yield self.keys[index][1]
+            index += 1
+
+    def containing(self, query: str) -> Iterator[int]:
+        if self.corpus is None:
+            ids: List[int] = []
+            starts: List[int] = []
+            texts: List[str] = []
+            offset = 0
+            for entry in self.entries.values():
+                text = entry.text
+                ids.append(entry.id)
+                starts.append(offset)
+                texts.append(text)
+                offset += len(text) + 1
+
+            self.corpus = ("\0".join(texts), starts, ids)
+
+        corpus, starts, ids = self.corpus
+        position = corpus.find(query)
+        while position != -1:
+            index = bisect_right(starts, position) - 1
+            yield ids[index]
+
+            # Continue from the next entry, each guild is yielded once.
+            if index + 1 >= len(starts):
+                break
+
+            position = corpus.find(query, starts[index + 1])
+
+    def ranked(self, sort: Sort) -> Dict[int, int]:
+        """Position of every guild by member count or name, cached for `ORDER_TTL`."""
+
+        key = "name" if sort == "name" else "members"
+        cached = self.orders.get(key)
+        if cached and monotonic() - cached[0] < self.ORDER_TTL:
+            return cached[1]
+
+        if key == "name":
+            order = sorted(self.entries, key=lambda guild_id: self.entries[guild_id].name)
+        else:
+            counts = {
+                guild_id: getattr(self.bot.get_guild(guild_id), "member_count", 0) or 0
+                for guild_id in self.entries
+            }
+            order = sorted(counts, key=counts.__getitem__, reverse=True)
+
+        ranks = {guild_id: position for position, guild_id in enumerate(order)}
+        self.orders[key] = (monotonic(), ranks)
+        return ranks
+
+    def search(self, query: Optional[str] = None, sort: Sort = "players") -> List[int]:
+        """IDs of the guilds matching a query by name, ID or owner.
+
+        Prefix matches are ranked ahead of substring matches, each in the
+        requested order. Only IDs are returned so callers can resolve the
+        guilds of the page being viewed.
+        """
+
+        ranks = self.ranked(sort)
+        prefixed: Set[int] = set()
+        if query:
+            query = query.casefold().strip()
+            prefixed = set(self.prefixed(query))
+            matched = prefixed.union(self.containing(query))
+            order = sorted(matched, key=ranks.__getitem__)
+        else:
+            # Dictionaries keep their insertion order, which is the ranking.
+            order = list(ranks)
+
+        if sort == "players":
+            sessions = self.bot.voice.sessions
+            order = [guild_id for guild_id in order if guild_id in sessions] + [
+                guild_id for guild_id in order if guild_id not in sessions
+            ]
+
+        if prefixed:
+            order = [guild_id for guild_id in order if guild_id in prefixed] + [
+                guild_id for guild_id in order if guild_id not in prefixed
+            ]
+
+        return order
+
+    def find(self, query: str) -> Optional[Guild]:
+        """The guild with an ID or the best match for a query."""
+
+        if query.isascii() and query.isdigit() and (guild := self.bot.get_guild(int(query))):
+            return guild
+
+        for guild_id in self.search(query):
+            if guild := self.bot.get_guild(guild_id):
+                return guild
+
+        return None
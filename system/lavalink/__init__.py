@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import logging
+from contextlib import suppress
+from time import time
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from aiohttp import ClientSession
+from discord import Client
+from wavelink import (
+    InvalidClientException,
+    InvalidNodeException,
+    LavalinkException,
+    Node,
+    NodeException,
+    NodeStatus,
+    Pool,
+    StatsEventPayload,
+    StatsResponsePayload,
+)
+from wavelink.websocket import Websocket
+
+from config import Lavalink
+
+from .telemetry import NodeSample, Series
+
+log = logging.getLogger(__name__)
+
+
+class NodeLoad:
+    """Snapshot of the statistics a Lavalink node last reported."""
+
+    __slots__ = (
+        "players",
+        "playing",
+        "system_load",
+        "lavalink_load",
+        "nulled",
+        "deficit",
+        "uptime",
+    )
+
+    def __init__(
+        self,
+        players: int = 0,
+        playing: int = 0,
+        system_load: float = 0.0,
+        lavalink_load: float = 0.0,
+        nulled: int = 0,
+        deficit: int = 0,
+        uptime: int = 0,
+    ) -> None:
+        self.players = players
+        self.playing = playing
+        self.system_load = system_load
+        self.lavalink_load = lavalink_load
+        self.nulled = nulled
+        self.deficit = deficit
+        self.uptime = uptime
+
+
+LOADS: Dict[str, NodeLoad] = {}
+SERIES: Dict[str, Series[NodeSample]] = {}
+
+Stats = Union[StatsEventPayload, StatsResponsePayload]
+
+
+def penalty(node: Node) -> float:
+    """Calculate the placement penalty of a node, lower is better.
+
+    The weighting follows the Lavalink client reference implementation,
+    players count linearly while CPU and frame loss grow exponentially.
+    """
+
+    load = LOADS.get(node.identifier) or NodeLoad()
+    players = max(load.playing, len(node.players))
+    cpu = 1.05 ** (100 * load.system_load) * 10 - 10
+    deficit = 1.03 ** (500 * (load.deficit / 3000)) * 600 - 600
+    nulled = (1.03 ** (500 * (load.nulled / 3000)) * 300 - 300) * 2
+
+    return players + cpu + deficit + nulled
+
+
+def connected_nodes(exclude: Iterable[Node] = ()) -> List[Node]:
+    excluded = {node.identifier for node in exclude}
+    return [
+        node
+        for node in Pool.nodes.values()
+        if node.status is NodeStatus.CONNECTED and node.identifier not in excluded
+    ]
+
+
+def select_node(exclude: Iterable[Node] = ()) -> Node:
+    """Return the connected node with the lowest penalty.
+
+    Raises:
+        InvalidNodeException: No node is currently connected.
+    """
+
+    nodes = connected_nodes(exclude)
+    if not nodes:
+        raise InvalidNodeException("No nodes are currently available in a CONNECTED state.")
+
+    return min(nodes, key=penalty)
+
+
+def admits(node: Node) -> bool:
+    """Whether a node has the headroom to take on another player."""
+
+    load = LOADS.get(node.identifier)
+    if not load:
+        return True
+
+    return (
+        load.system_load < Lavalink.ADMISSION_CPU
+        and load.deficit < Lavalink.ADMISSION_DEFICIT
+    )
+
+
+def record(node: Node, stats: Stats) -> NodeLoad:
+    """Store the statistics of a node for placement and its rolling series."""
+
+    load = LOADS.setdefault(node.identifier, NodeLoad())
+    load.players = stats.players
+    load.playing = stats.playing
+    load.system_load = stats.cpu.system_load
+    load.lavalink_load = stats.cpu.lavalink_load
+    load.uptime = stats.uptime
+    sent = 0
+    if stats.frames:
+        sent = stats.frames.sent
+        load.nulled = stats.frames.nulled
+        load.deficit = stats.frames.deficit
+
+    series = SERIES.get(node.identifier)
+    if not series:
+        series = SERIES[node.identifier] = Series(Lavalink.NODE_SERIES_SIZE)
+
+    series.add(
+        NodeSample(
+            time(),
+            load.players,
+            load.playing,
+            load.system_load,
+            load.lavalink_load,
+            stats.memory.used,
+            sent,
+            load.nulled,
+            load.deficit,
+        )
+    )
+    return load
+
+
+class NodeWebsocket(Websocket):
+    """Websocket which records the stats Lavalink pushes against its node."""
+
+    def dispatch(self, event: str, /, *args: Any, **kwargs: Any) -> None:
+        # The stats event doesn't say which node sent it, but this is the
+        # only place which knows.
+        if event == "stats_update":
+            record(self.node, args[0])
+
+        super().dispatch(event, *args, **kwargs)
+
+
+class LavalinkNode(Node):
+    """Node whose pushed stats are recorded for placement as they arrive."""
+
+    async def _connect(self, *, client: Optional[Client]) -> None:
+        # Mirrors `Node._connect`, only with our websocket.
+        client = self._client or client
+        if not client:
+            raise InvalidClientException(
+                f"Unable to connect {self!r} as you have not provided a valid discord.Client."
+            )
+
+        self._client = client
+        self._has_closed = False
+        if not self._session or self._session.closed:
+            self._session = ClientSession()
+
+        websocket = NodeWebsocket(node=self)
+        self._websocket = websocket
+        await websocket.connect()
+
+
+async def refresh(node: Node) -> Optional[NodeLoad]:
+    """Fetch the latest statistics of a node and store them for placement."""
+
+    if node.status is not NodeStatus.CONNECTED:
+        return None
+
+    try:
+        stats = await node.fetch_stats()
+    except (LavalinkException, NodeException) as exc:
+        log.warning("Failed to fetch stats for node %s: %s", node.identifier, exc)
+        return None
+
+    return record(node, stats)
+
+
+def forget(node: Node) -> None:
+    with suppress(KeyError):
+        del LOADS[node.identifier]
+
+    SERIES.pop(node.identifier, None)
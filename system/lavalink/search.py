@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections import OrderedDict
+from time import monotonic, perf_counter
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+from asyncpg import InterfaceError, PostgresError
+from wavelink import Playable, Playlist, Search, TrackSource
+from yarl import URL
+
+from config import Lavalink
+
+if TYPE_CHECKING:
+    from wock import Wock
+
+log = logging.getLogger(__name__)
+
+# The cache is best-effort, a database which can't be reached is a miss.
+UNAVAILABLE = (PostgresError, InterfaceError, OSError, asyncio.TimeoutError)
+
+Key = Tuple[str, str]
+
+PREFIXES = {
+    TrackSource.YouTube: "ytsearch",
+    TrackSource.YouTubeMusic: "ytmsearch",
+    TrackSource.SoundCloud: "scsearch",
+}
+
+
+def normalize(query: str, source: TrackSource | str | None) -> Key:
+    """Normalize a query so equivalent searches share a cache entry.
+
+    URLs are kept verbatim since their identifiers are case sensitive. The
+    source is stored as its search prefix, so a key can be searched again.
+    """
+
+    query = query.strip()
+    if not URL(query).host:
+        query = " ".join(query.lower().split())
+
+    if isinstance(source, TrackSource):
+        source = PREFIXES[source]
+
+    return query, source or ""
+
+
+def dump(result: Search) -> Dict[str, Any]:
+    """Serialize a search result into the raw Lavalink payloads it was built from."""
+
+    if isinstance(result, Playlist):
+        return {
+            "playlist": {
+                "info": {"name": result.name, "selectedTrack": result.selected},
+                "pluginInfo": {
+                    "type": result.type,
+                    "url": result.url,
+                    "artworkUrl": result.artwork,
+                    "author": result.author,
+                },
+                "tracks": [track.raw_data for track in result.tracks],
+            }
+        }
+
+    return {"tracks": [track.raw_data for track in result]}
+
+
+def load(payload: Dict[str, Any]) -> Search:
+    """Rebuild a search result from its raw payloads without contacting Lavalink."""
+
+    if playlist := payload.get("playlist"):
+        return Playlist(playlist)
+
+    return [Playable(track) for track in payload["tracks"]]
+
+
+class SearchCache:
+    """Two tier cache in front of `Playable.search`.
+
+    Results are kept as raw Lavalink payloads (including the encoded track)
+    in an in-memory LRU, backed by the `search_cache` table so they survive
+    restarts. Every hit builds fresh `Playable` objects, so per-request
+    extras never leak between guilds.
+    """
+
+    def __init__(self, bot: Wock) -> None:
+        self.bot = bot
+        self.entries: OrderedDict[Key, Tuple[float, Dict[str, Any]]] = OrderedDict()
+        self.pending: Dict[Key, asyncio.Future[Optional[Dict[str, Any]]]] = {}
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.miss_latency = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    @property
+    def saved(self) -> float:
+        """Approximate seconds of Lavalink loading avoided by cache hits."""
+
+        if not self.misses:
+            return 0.0
+
+        return self.hits * (self.miss_latency / self.misses)
+
+    def remember(self, key: Key, payload: Dict[str, Any], expires_at: float) -> None:
+        self.entries[key] = (expires_at, payload)
+        self.entries.move_to_end(key)
+        while len(self.entries) > Lavalink.SEARCH_CACHE_SIZE:
+            self.entries.popitem(last=False)
+
+    async def fetch(self, key: Key) -> Optional[Dict[str, Any]]:
+        if entry := self.entries.get(key):
+            expires_at, payload = entry
+            if expires_at > monotonic():
+                self.entries.move_to_end(key)
+                return payload
+
+            del self.entries[key]
+
+        query = """
+        SELECT payload, EXTRACT(EPOCH FROM expires_at - NOW()) AS remaining
+        FROM search_cache
+        WHERE query = $1
+        AND source = $2
+        AND expires_at > NOW()
+        """
+        try:
+            record = await self.bot.pool.fetchrow(query, *key)
+        except UNAVAILABLE as exc:
+            log.warning("Failed to read search cache for %r: %s", key, exc)
+            return None
+
+        if not record:
+            return None
+
+        payload = json.loads(record["payload"])
+        self.remember(key, payload, monotonic() + float(record["remaining"]))
+        self.persistent_hits += 1
+        return payload
+
+    async def store(self, key: Key, payload: Dict[str, Any]) -> None:
+        self.remember(key, payload, monotonic() + Lavalink.SEARCH_CACHE_TTL)
+
+        query = """
+        INSERT INTO search_cache (
+            query,
+            source,
+            payload,
+            expires_at
+        ) VALUES ($1, $2, $3::JSONB, NOW() + $4 * INTERVAL '1 second')
+        ON CONFLICT (query, source)
+        DO UPDATE SET
+            payload = EXCLUDED.payload,
+            expires_at = EXCLUDED.expires_at;
+        """
+        try:
+            await self.bot.pool.execute(
+                query,
+                *key,
+                json.dumps(payload),
+                Lavalink.SEARCH_CACHE_TTL,
+            )
+        except UNAVAILABLE as exc:
+            log.warning("Failed to persist search cache for %r: %s", key, exc)
+
+    async def prune(self) -> None:
+        """Remove expired rows from the persistent tier."""
+
+        await self.bot.pool.execute("DELETE FROM search_cache WHERE expires_at <= NOW()")
+
+    async def search(
+        self,
+        query: str,
+        *,
+        source: TrackSource | str | None = TrackSource.YouTube,
+    ) -> Search:
+        """Search for tracks, serving repeated queries from the cache.
+
+        Concurrent misses for the same query share a single Lavalink load.
+        """
+
+        key = normalize(query, source)
+        if payload := await self.fetch(key):
+            self.hits += 1
+            return load(payload)
+
+        if future := self.pending.get(key):
+            payload = await asyncio.shield(future)
+            if payload:
+                self.hits += 1
+                return load(payload)
+
+            return await Playable.search(query, source=source)
+
+        future = asyncio.get_running_loop().create_future()
+        self.pending[key] = future
+        try:
+            started = perf_counter()
+            result = await Playable.search(query, source=source)
+            self.misses += 1
+            self.miss_latency += perf_counter() - started
+
+            payload = None
+            tracks = result.tracks if isinstance(result, Playlist) else result
+            if tracks and not any(track.is_stream for track in tracks):
+                payload = dump(result)
+                await self.store(key, payload)
+        except BaseException:
+            future.set_result(None)
+            raise
+        else:
+            future.set_result(payload)
+        finally:
+            del self.pending[key]
+
+        return result
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from collections import deque
+from time import time
+from typing import Deque, Generic, Iterator, NamedTuple, Optional, TypeVar
+
+T = TypeVar("T", bound=tuple)
+
+
+class NodeSample(NamedTuple):
+    at: float
+    players: int
+    playing: int
+    system_load: float
+    lavalink_load: float
+    memory_used: int
+    sent: int
+    nulled: int
+    deficit: int
+
+
+class PlayerSample(NamedTuple):
+    at: float
+    position: int
+    ping: int
+    connected: bool
+
+
+class Series(Generic[T]):
+    """Fixed size rolling window of samples, oldest first."""
+
+    __slots__ = ("samples",)
+
+    def __init__(self, size: int) -> None:
+        self.samples: Deque[T] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self.samples)
+
+    def add(self, sample: T) -> None:
+        self.samples.append(sample)
+
+    @property
+    def last(self) -> Optional[T]:
+        return self.samples[-1] if self.samples else None
+
+    def mean(self, field: str) -> float:
+        if not self.samples:
+            return 0.0
+
+        return sum(getattr(sample, field) for sample in self.samples) / len(self.samples)
+
+    def peak(self, field: str) -> float:
+        return max((getattr(sample, field) for sample in self.samples), default=0)
+
+
+class PlayerTelemetry:
+    """Playback quality of a single player.
+
+    Player updates from Lavalink are kept as a rolling series, while stuck
+    tracks and track exceptions are counted over the life of the player.
+    """
+
+    __slots__ = ("series", "stuck", "exceptions", "retries", "retried")
+
+    def __init__(self, size: int) -> None:
+        self.series: Series[PlayerSample] = Series(size)
+        self.stuck = 0
+        self.exceptions = 0
+        self.retries = 0
+        self.retried: Optional[str] = None
+
+    def update(self, position: int, ping: int, connected: bool) -> None:
+        self.series.add(PlayerSample(time(), position, ping, connected))
+
+    def should_retry(self, encoded: str) -> bool:
+        """Whether a failing track gets another attempt, each track gets one."""
+
+        if self.retried == encoded:
+            return False
+
+        self.retried = encoded
+        self.retries += 1
+        return True
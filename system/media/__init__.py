@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+from collections import OrderedDict
+from contextlib import suppress
+from itertools import chain
+from os import environ
+from typing import TYPE_CHECKING, Callable, List, Optional, Set, Tuple
+
+from aiohttp import web
+from anyio import Path
+from discord import Attachment
+
+from config import Media
+
+if TYPE_CHECKING:
+    from wock import Wock
+
+log = logging.getLogger(__name__)
+
+NAME = re.compile(r"^[0-9a-f]{64}\.[a-z0-9]{1,5}$")
+SUFFIX = re.compile(r"^\.[a-z0-9]{1,5}$")
+SPEECH_PATH = "/speech/"
+
+Lookup = Callable[[str], Optional[bytes]]
+
+
+def suffix_of(filename: str, default: str = ".bin") -> str:
+    suffix = os.path.splitext(filename)[1].lower()
+    return suffix if SUFFIX.match(suffix) else default
+
+
+class MediaStore:
+    """Content addressed store for audio Lavalink should play.
+
+    Files are named by the SHA-256 of their content, so the same audio
+    uploaded in different guilds is stored once. The store is kept under a
+    disk budget by evicting the least recently used files, and access times
+    are written back to the files so the order survives restarts. Lavalink
+    fetches the files through a small HTTP server instead of external CDNs.
+
+    Synthesized speech is served under its own route from the in-memory
+    buffers registered with `register`, falling back to the files on disk.
+    """
+
+    def __init__(self, bot: Wock) -> None:
+        self.bot = bot
+        self.root = Path(environ.get("MEDIA_ROOT", Media.ROOT))
+        self.base_url = environ.get(
+            "MEDIA_URL", f"http://{Media.HOST}:{Media.PORT}"
+        ).rstrip("/")
+        self.entries: OrderedDict[str, int] = OrderedDict()
+        self.aliases: OrderedDict[str, str] = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = asyncio.Lock()
+        self.lookups: List[Lookup] = []
+        self.runner: Optional[web.AppRunner] = None
+
+    def path(self, name: str) -> Path:
+        return self.root / name[:2] / name
+
+    def url(self, name: str) -> str:
+        return f"{self.base_url}/media/{name}"
+
+    def speech_url(self, name: str) -> str:
+        return f"{self.base_url}{SPEECH_PATH}{name}"
+
+    def register(self, lookup: Lookup) -> None:
+        """Serve the buffers returned by `lookup` on the speech route."""
+
+        self.lookups.append(lookup)
+
+    def unregister(self, lookup: Lookup) -> None:
+        if lookup in self.lookups:
+            self.lookups.remove(lookup)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.entries
+
+    async def load(self) -> None:
+        """Index the files already on disk, oldest access first.
+
+        Partial files of interrupted writes are removed along the way.
+        """
+
+        def scan() -> List[Tuple[float, str, int]]:
+            files: List[Tuple[float, str, int]] = []
+            os.makedirs(self.root, exist_ok=True)
+            for directory in os.scandir(self.root):
+                if not directory.is_dir():
+                    continue
+
+                for entry in os.scandir(directory.path):
+                    # Left behind by writes which were interrupted.
+                    if entry.name.endswith(".partial"):
+                        try:
+                            os.unlink(entry.path)
+                        except OSError as exc:
+                            log.warning("Failed to remove %s: %s", entry.path, exc)
+
+                        continue
+
+                    if entry.is_file() and NAME.match(entry.name):
+                        stat = entry.stat()
+                        files.append((stat.st_atime, entry.name, stat.st_size))
+
+            return sorted(files)
+
+        self.entries.clear()
+        self.size = 0
+        for _, name, size in await asyncio.to_thread(scan):
+            self.entries[name] = size
+            self.size += size
+
+        log.info(
+            "Indexed %s media files using %s bytes", len(self.entries), self.size
+        )
+
+    def touch(self, name: str) -> None:
+        self.entries.move_to_end(name)
+        try:
+            os.utime(self.path(name))
+        except OSError:
+            pass
+
+    async def put(self, data: bytes, suffix: str, digest: Optional[str] = None) -> str:
+        """Store audio and return its content addressed name.
+
+        Audio derived deterministically from some input (such as synthesized
+        speech) can pass the hash of that input as `digest` instead.
+        """
+
+        name = (digest or hashlib.sha256(data).hexdigest()) + suffix
+        if name in self.entries:
+            self.hits += 1
+            self.touch(name)
+            return name
+
+        self.misses += 1
+        async with self.lock:
+            if name in self.entries:
+                return name
+
+            path = self.path(name)
+            await path.parent.mkdir(parents=True, exist_ok=True)
+            # Written under a temporary name first so the server never
+            # serves a partial file.
+            partial = path.with_name(f"{name}.partial")
+            try:
+                await partial.write_bytes(data)
+                await partial.rename(path)
+            except BaseException:
+                with suppress(OSError):
+                    await partial.unlink()
+
+                raise
+
+            self.entries[name] = len(data)
+            self.size += len(data)
+            await self.evict()
+
+        return name
+
+    async def put_attachment(self, attachment: Attachment) -> Optional[str]:
+        """Store an attachment, returning None when it is over the size limit.
+
+        Replays of the same attachment are resolved without downloading it
+        again, other uploads of the same file are deduplicated by content.
+        """
+
+        if attachment.size > Media.MAX_SIZE:
+            return None
+
+        key = attachment.url.split("?", 1)[0]
+        if (name := self.aliases.get(key)) and name in self.entries:
+            self.hits += 1
+            self.aliases.move_to_end(key)
+            self.touch(name)
+            return name
+
+        data = await attachment.read()
+        name = await self.put(data, suffix_of(attachment.filename))
+        self.aliases[key] = name
+        while len(self.aliases) > Media.ALIASES:
+            self.aliases.popitem(last=False)
+
+        return name
+
+    def referenced(self) -> Set[str]:
+        """Names of the files which are playing or queued on any player."""
+
+        names: Set[str] = set()
+        for client in self.bot.voice_clients:
+            current = getattr(client, "current", None)
+            queue = getattr(client, "queue", None) or ()
+            for track in chain((current,) if current else (), queue):
+                uri = track.uri or ""
+                if uri.startswith(self.base_url):
+                    name = uri.rsplit("/", 1)[-1]
+                    if NAME.match(name):
+                        names.add(name)
+
+        return names
+
+    async def evict(self) -> None:
+        """Evict the least recently used files until the store is under budget.
+
+        Files a player still has to play are skipped, Lavalink would fail to
+        load them otherwise.
+        """
+
+        if self.size <= Media.BUDGET:
+            return
+
+        referenced = self.referenced()
+        for name in list(self.entries):
+            if self.size <= Media.BUDGET or len(self.entries) <= 1:
+                break
+
+            if name in referenced:
+                continue
+
+            self.size -= self.entries.pop(name)
+            self.evictions += 1
+            try:
+                await self.path(name).unlink()
+            except FileNotFoundError:
+                pass
+
+    async def serve(self, request: web.Request) -> web.StreamResponse:
+        name = request.match_info["name"]
+        if not NAME.match(name) or name not in self.entries:
+            raise web.HTTPNotFound()
+
+        self.touch(name)
+        content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        return web.FileResponse(
+            str(self.path(name)),
+            headers={"Content-Type": content_type},
+        )
+
+    async def serve_speech(self, request: web.Request) -> web.StreamResponse:
+        name = request.match_info["name"]
+        if not NAME.match(name):
+            raise web.HTTPNotFound()
+
+        for lookup in self.lookups:
+            if (data := lookup(name)) is not None:
+                content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+                return web.Response(body=data, content_type=content_type)
+
+        # Buffers evicted from memory are still written to disk.
+        return await self.serve(request)
+
+    async def start(self) -> None:
+        await self.load()
+
+        app = web.Application()
+        app.router.add_get("/media/{name}", self.serve)
+        app.router.add_get(SPEECH_PATH + "{name}", self.serve_speech)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+
+        site = web.TCPSite(self.runner, Media.HOST, Media.PORT)
+        await site.start()
+
+    async def close(self) -> None:
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
@@ -5,7 +5,7 @@ from discord import Embed, HTTPException, Interaction, Message, ButtonStyle, Tex
 from discord.ui import TextInput, Modal
 
 
-from typing import TYPE_CHECKING, Any, List, Optional, Self, Union
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Self, Sequence, TypeVar, Union, overload
 
 from discord.ui.item import Item
 
@@ -16,6 +16,52 @@ from system.utils import View, Button
 if TYPE_CHECKING:
     from system.base import Context
 
+T = TypeVar("T")
+
+
+class Pages(Sequence[Embed]):
+    """
+    Embeds which are only rendered once their page is viewed.
+    """
+
+    def __init__(
+        self,
+        items: Sequence[T],
+        render: Callable[[Sequence[T], int], Embed],
+        per_page: int = 6,
+    ):
+        self.items = items
+        self.render = render
+        self.per_page = per_page
+        self.rendered: Dict[int, Embed] = {}
+
+    def __len__(self) -> int:
+        return max(1, math.ceil(len(self.items) / self.per_page))
+
+    @overload
+    def __getitem__(self, index: int) -> Embed: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Embed]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Embed, List[Embed]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+
+        if not 0 <= index < len(self):
+            raise IndexError("page index out of range")
+
+        if index not in self.rendered:
+            start = index * self.per_page
+            self.rendered[index] = self.render(
+                self.items[start : start + self.per_page], index
+            )
+
+        return self.rendered[index]
+
 
 class Paginator(View):
     """
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+from collections import Counter
+from os.path import basename
+from time import perf_counter
+from types import CodeType, FrameType
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from config import Profiling
+
+# Leaf frames of threads which are waiting for work rather than doing any.
+IDLE = frozenset(
+    (
+        "selectors.py:EpollSelector.select",
+        "selectors.py:KqueueSelector.select",
+        "selectors.py:PollSelector.select",
+        "selectors.py:SelectSelector.select",
+        "thread.py:_worker",
+        "threading.py:Condition.wait",
+        "threading.py:Thread._wait_for_tstate_lock",
+        "queue.py:Queue.get",
+    )
+)
+
+
+class Hotspot(NamedTuple):
+    function: str
+    own: int
+    total: int
+
+
+class Profile:
+    """Samples of every thread's stack, folded into collapsed stacks.
+
+    Each stack is the thread's name followed by its frames from the
+    outermost in, separated with semicolons, which is the input format of
+    flamegraph.pl, speedscope and inferno.
+    """
+
+    def __init__(
+        self,
+        stacks: Counter[Tuple[str, ...]],
+        samples: int,
+        elapsed: float,
+        overhead: float,
+    ) -> None:
+        self.stacks = stacks
+        self.samples = samples
+        self.elapsed = elapsed
+        self.overhead = overhead
+
+    @property
+    def idle(self) -> int:
+        return sum(count for stack, count in self.stacks.items() if stack[-1] in IDLE)
+
+    @property
+    def busy(self) -> int:
+        return sum(self.stacks.values()) - self.idle
+
+    def collapsed(self) -> str:
+        return "\n".join(
+            f"{';'.join(stack)} {count}"
+            for stack, count in sorted(self.stacks.items())
+        )
+
+    def hotspots(self, limit: int = 10) -> List[Hotspot]:
+        """The functions with the most busy samples on top of the stack.
+
+        Also counts the busy samples with the function anywhere in the
+        stack, once per sample no matter how deep the recursion goes.
+        """
+
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            if stack[-1] in IDLE:
+                continue
+
+            own[stack[-1]] += count
+            for function in set(stack[1:]):
+                total[function] += count
+
+        return [
+            Hotspot(function, count, total[function])
+            for function, count in own.most_common(limit)
+        ]
+
+
+class Sampler:
+    """Sampling profiler for every thread of the process.
+
+    A daemon thread reads the stack of every other thread with
+    `sys._current_frames` every `interval` seconds, so the event loop, the
+    executor threads running synthesis and everything else are profiled
+    without being instrumented or slowed down beyond the sampling itself.
+    """
+
+    def __init__(self, interval: float = Profiling.INTERVAL) -> None:
+        self.interval = interval
+        self.stacks: Counter[Tuple[str, ...]] = Counter()
+        self.labels: Dict[CodeType, str] = {}
+        self.samples = 0
+        self.overhead = 0.0
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def label(self, code: CodeType) -> str:
+        label = self.labels.get(code)
+        if label is None:
+            label = self.labels[code] = f"{basename(code.co_filename)}:{code.co_qualname}"
+
+        return label
+
+    def sample(self) -> None:
+        started = perf_counter()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+
+            stack: List[str] = []
+            current: Optional[FrameType] = frame
+            while current is not None and len(stack) < Profiling.MAX_DEPTH:
+                stack.append(self.label(current.f_code))
+                current = current.f_back
+
+            stack.append(names.get(ident, f"thread-{ident}").replace(";", ":"))
+            stack.reverse()
+            self.stacks[tuple(stack)] += 1
+
+        self.samples += 1
+        self.overhead += perf_counter() - started
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    async def profile(self, duration: float) -> Profile:
+        """Sample for `duration` seconds without blocking the event loop."""
+
+        self.thread = threading.Thread(target=self.run, name="profiler", daemon=True)
+        started = perf_counter()
+        self.thread.start()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            self.stopped.set()
+            await asyncio.to_thread(self.thread.join)
+
+        elapsed = perf_counter() - started
+        return Profile(self.stacks, self.samples, elapsed, self.overhead)
@@ -4,8 +4,60 @@ CREATE TABLE IF NOT EXISTS tts_preferences (
     language VARCHAR(5) DEFAULT 'en'
 );
 
+CREATE TABLE IF NOT EXISTS tts_slang (
+    guild_id BIGINT NOT NULL,
+    slang TEXT NOT NULL,
+    replacement TEXT NOT NULL,
+    PRIMARY KEY (guild_id, slang)
+);
+
 CREATE TABLE IF NOT EXISTS blacklist (
     target_id BIGINT PRIMARY KEY,
     reason TEXT,
     created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
-);
\ No newline at end of file
+);
+
+CREATE TABLE IF NOT EXISTS search_cache (
+    query TEXT NOT NULL,
+    source TEXT NOT NULL,
+    payload JSONB NOT NULL,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    PRIMARY KEY (query, source)
+);
+
+CREATE TABLE IF NOT EXISTS lavalink_sessions (
+    identifier TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS player_sessions (
+    guild_id BIGINT PRIMARY KEY,
+    channel_id BIGINT NOT NULL,
+    text_channel_id BIGINT NOT NULL,
+    message_id BIGINT NOT NULL,
+    controller_id BIGINT,
+    node TEXT NOT NULL,
+    track TEXT,
+    requester_id BIGINT,
+    position BIGINT NOT NULL DEFAULT 0,
+    paused BOOLEAN NOT NULL DEFAULT FALSE,
+    volume INTEGER NOT NULL DEFAULT 100,
+    loop_mode TEXT NOT NULL DEFAULT 'normal',
+    synthesize BOOLEAN NOT NULL DEFAULT FALSE,
+    queue JSONB NOT NULL DEFAULT '[]',
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+CREATE TABLE IF NOT EXISTS play_events (
+    kind TEXT NOT NULL,
+    guild_id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    query TEXT,
+    source TEXT NOT NULL,
+    identifier TEXT,
+    title TEXT,
+    author TEXT,
+    length BIGINT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS play_events_kind_created_at ON play_events (kind, created_at);
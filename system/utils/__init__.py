@@ -63,6 +63,25 @@ def pluralize(text: str, count: int) -> str:
     return text + ("s" if count != 1 else "")
 
 
+def format_size(size: Union[int, float]) -> str:
+    """
+    Format a number of bytes into a human readable size.
+
+    Args:
+        size (Union[int, float]): The number of bytes.
+
+    Returns:
+        str: The size with the largest fitting unit, e.g. "1.5 MB".
+    """
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(size) < 1024 or unit == "GB":
+            break
+
+        size /= 1024
+
+    return f"{size:,.0f} {unit}" if unit == "B" else f"{size:,.1f} {unit}"
+
+
 def hierachy(role: Role, ctx: "Context") -> bool:
     """Check if the role is below the author's top role and the bot's top role.
 
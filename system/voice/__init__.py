@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Set, Tuple
+
+from discord import Member, VoiceState
+from discord.abc import Connectable
+
+if TYPE_CHECKING:
+    from wock import Wock
+
+
+class VoiceSession:
+    """The voice channel the bot is connected to in a guild and who is in it."""
+
+    __slots__ = ("channel_id", "members", "bots")
+
+    def __init__(self, channel_id: int, members: Iterable[Member] = ()) -> None:
+        self.channel_id = channel_id
+        self.members: Set[int] = set()
+        self.bots: Set[int] = set()
+        for member in members:
+            self.add(member)
+
+    def add(self, member: Member) -> None:
+        self.members.add(member.id)
+        if member.bot:
+            self.bots.add(member.id)
+
+    def discard(self, member: Member) -> None:
+        self.members.discard(member.id)
+        self.bots.discard(member.id)
+
+    @property
+    def listeners(self) -> int:
+        """The number of members in the channel which are not bots."""
+
+        return len(self.members) - len(self.bots)
+
+
+class VoiceRegistry:
+    """Registry of the bot's voice sessions, kept current from voice state updates.
+
+    Checks which run on every command or button press (is the bot connected,
+    is the author in its channel, how many members are listening) become set
+    lookups instead of walking the channel's member list. Connect attempts
+    are serialized per guild through `lock`.
+
+    The `(guild_id, channel_id)` pairs of the channels whose messages are
+    synthesized are indexed as well, so the message listener can drop
+    every other message on a single lookup.
+    """
+
+    def __init__(self, bot: Wock) -> None:
+        self.bot = bot
+        self.sessions: Dict[int, VoiceSession] = {}
+        self.locks: Dict[int, asyncio.Lock] = {}
+        self.synthesizers: Set[int] = set()
+        self.synthesizing: Set[Tuple[int, int]] = set()
+
+    def get(self, guild_id: int) -> Optional[VoiceSession]:
+        return self.sessions.get(guild_id)
+
+    def channel_id(self, guild_id: int) -> Optional[int]:
+        session = self.sessions.get(guild_id)
+        return session and session.channel_id
+
+    def is_listening(self, guild_id: int, member_id: int) -> bool:
+        """Whether a member is in the voice channel the bot is connected to."""
+
+        session = self.sessions.get(guild_id)
+        return bool(session and member_id in session.members)
+
+    def is_synthesizing(self, guild_id: int, channel_id: int) -> bool:
+        """Whether messages sent in a channel are synthesized."""
+
+        return (guild_id, channel_id) in self.synthesizing
+
+    def set_synthesize(self, guild_id: int, enabled: bool) -> None:
+        session = self.sessions.get(guild_id)
+        if enabled:
+            self.synthesizers.add(guild_id)
+            if session:
+                self.synthesizing.add((guild_id, session.channel_id))
+        else:
+            self.synthesizers.discard(guild_id)
+            if session:
+                self.synthesizing.discard((guild_id, session.channel_id))
+
+    def lock(self, guild_id: int) -> asyncio.Lock:
+        """The lock held while connecting to a voice channel in a guild."""
+
+        lock = self.locks.get(guild_id)
+        if not lock:
+            lock = self.locks[guild_id] = asyncio.Lock()
+
+        return lock
+
+    def track(self, channel: Connectable) -> VoiceSession:
+        """Start tracking the channel the bot is connected to."""
+
+        guild_id: int = channel.guild.id  # type: ignore
+        if previous := self.sessions.get(guild_id):
+            self.synthesizing.discard((guild_id, previous.channel_id))
+
+        session = VoiceSession(channel.id, channel.members)  # type: ignore
+        self.sessions[guild_id] = session
+        if guild_id in self.synthesizers:
+            # The bot was moved, messages follow it to the new channel.
+            self.synthesizing.add((guild_id, channel.id))
+
+        return session
+
+    def forget(self, guild_id: int) -> None:
+        if session := self.sessions.pop(guild_id, None):
+            self.synthesizing.discard((guild_id, session.channel_id))
+
+        self.synthesizers.discard(guild_id)
+        lock = self.locks.get(guild_id)
+        if lock and not lock.locked():
+            del self.locks[guild_id]
+
+    def update(self, member: Member, before: VoiceState, after: VoiceState) -> None:
+        guild_id = member.guild.id
+        if member.id == self.bot.user.id:  # type: ignore
+            if after.channel:
+                self.track(after.channel)
+            else:
+                self.forget(guild_id)
+
+            return
+
+        session = self.sessions.get(guild_id)
+        if not session:
+            return
+
+        if before.channel and before.channel.id == session.channel_id:
+            session.discard(member)
+
+        if after.channel and after.channel.id == session.channel_id:
+            session.add(member)
+
+    def rebuild(self) -> None:
+        """Rebuild every session from the cache, e.g. after the gateway reconnects."""
+
+        self.sessions.clear()
+        self.synthesizing.clear()
+        for guild in self.bot.guilds:
+            if guild.me and guild.me.voice and guild.me.voice.channel:
+                self.track(guild.me.voice.channel)
+
+        self.synthesizers &= self.sessions.keys()
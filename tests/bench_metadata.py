@@ -0,0 +1,33 @@
+"""Time `clean_title` over the title corpus.
+
+Run with `python -m tests.bench_metadata` from the repository root.
+"""
+
+from timeit import repeat
+
+from extensions.music.player.metadata import clean_title
+
+from .test_metadata import CORPUS
+
+ROUNDS = 1000
+
+
+def clean_all() -> None:
+    for title, author, *_ in CORPUS:
+        clean_title(title, author)
+
+
+def uncached() -> None:
+    clean_title.cache_clear()
+    clean_all()
+
+
+def main() -> None:
+    for name, function in (("uncached", uncached), ("cached", clean_all)):
+        best = min(repeat(function, number=ROUNDS, repeat=5))
+        per_title = best / (ROUNDS * len(CORPUS)) * 1e6
+        print(f"{name}: {per_title:.2f}µs per title")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+from system.blacklist import MAX_ID, parse_entries
+
+
+def test_parse_entries() -> None:
+    text = "\n".join(
+        [
+            "target_id,reason,created_at",
+            "123,raiding,2024-01-01 00:00:00+00",
+            "# a comment",
+            "",
+            "456 spam bot",
+            "789\tselfbot in  many servers",
+            "  1011  ",
+            "123,a later reason",
+            "not-an-id",
+            "12x34 typo",
+            "²",
+            f"{MAX_ID + 1}",
+        ]
+    )
+    entries, invalid = parse_entries(text)
+    assert entries == [
+        (123, "raiding"),
+        (456, "spam bot"),
+        (789, "selfbot in  many servers"),
+        (1011, None),
+    ]
+    assert invalid == 4
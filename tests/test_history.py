@@ -0,0 +1,32 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Any, List
+
+from config import History
+from extensions.music.history import PlayHistory
+
+
+class Pool:
+    def __init__(self) -> None:
+        self.copied: List[Any] = []
+
+    async def copy_records_to_table(self, table: str, *, records: List[Any], columns: Any) -> None:
+        await asyncio.sleep(0.01)
+        self.copied.extend(records)
+
+
+def test_close_waits_for_flushes_in_flight() -> None:
+    async def main() -> None:
+        pool = Pool()
+        history = PlayHistory(SimpleNamespace(pool=pool))
+        for index in range(History.BATCH_SIZE):
+            history.search(1, 1, f"query {index}", "ytsearch")
+
+        assert len(history.flushes) == 1
+        history.search(1, 1, "late", "ytsearch")
+        await history.close()
+
+        assert not history.flushes
+        assert history.flushed == len(pool.copied) == History.BATCH_SIZE + 1
+
+    asyncio.run(main())
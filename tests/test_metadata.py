@@ -0,0 +1,102 @@
+import pytest
+
+from extensions.music.player.metadata import clean_author, clean_title
+
+# Real YouTube titles with their uploader, and the title and author shown
+# in the now playing embed.
+CORPUS = [
+    (
+        "Rick Astley - Never Gonna Give You Up (Official Music Video)",
+        "Rick Astley",
+        "Never Gonna Give You Up",
+        "Rick Astley",
+    ),
+    (
+        "Daft Punk - Get Lucky (Official Audio) ft. Pharrell Williams, Nile Rodgers",
+        "Daft Punk",
+        "Get Lucky",
+        "Daft Punk",
+    ),
+    ("The Weeknd - Blinding Lights (Official Video)", "The Weeknd", "Blinding Lights", "The Weeknd"),
+    ("Ed Sheeran - Shape of You (Official Music Video)", "Ed Sheeran", "Shape of You", "Ed Sheeran"),
+    ("Eminem - Lose Yourself [HD]", "EminemVEVO", "Lose Yourself", "Eminem"),
+    ("Billie Eilish - bad guy", "Billie Eilish", "bad guy", "Billie Eilish"),
+    (
+        "Gotye - Somebody That I Used To Know (feat. Kimbra) - official music video",
+        "gotye",
+        "Somebody That I Used To Know",
+        "gotye",
+    ),
+    ("Mark Ronson - Uptown Funk (Official Video) ft. Bruno Mars", "Mark Ronson", "Uptown Funk", "Mark Ronson"),
+    ("Luis Fonsi - Despacito ft. Daddy Yankee", "LuisFonsiVEVO", "Despacito", "LuisFonsi"),
+    ("Travis Scott - SICKO MODE ft. Drake", "TravisScottVEVO", "SICKO MODE", "TravisScott"),
+    (
+        "Dua Lipa - Levitating Featuring DaBaby (Official Music Video)",
+        "Dua Lipa",
+        "Levitating",
+        "Dua Lipa",
+    ),
+    ("Kendrick Lamar - HUMBLE. [Explicit]", "KendrickLamarVEVO", "HUMBLE.", "KendrickLamar"),
+    ("AC/DC - Back In Black (Official 4K Video)", "AC/DC", "Back In Black", "AC/DC"),
+    ("Drake - God's Plan", "DrakeVEVO", "God's Plan", "Drake"),
+    ("Never Gonna Give You Up", "Rick Astley - Topic", "Never Gonna Give You Up", "Rick Astley"),
+    ("Mr. Brightside", "The Killers - Topic", "Mr. Brightside", "The Killers"),
+    (
+        "Bad Bunny - Tití Me Preguntó (Video Oficial) | Un Verano Sin Ti",
+        "Bad Bunny",
+        "Tití Me Preguntó",
+        "Bad Bunny",
+    ),
+    (
+        "Stromae - Alors on danse (Vidéo Officielle)",
+        "Stromae",
+        "Alors on danse",
+        "Stromae",
+    ),
+    ("YOASOBI「夜に駆ける」 Official Music Video", "Ayase / YOASOBI", "YOASOBI「夜に駆ける」", "Ayase / YOASOBI"),
+    # Lyric channels upload under their own name, so the artist stays.
+    ("Adele - Hello (Lyrics)", "7clouds", "Adele - Hello", "7clouds"),
+    ("Imagine Dragons - Believer (Lyrics)", "Taj Tracks", "Imagine Dragons - Believer", "Taj Tracks"),
+    # Brackets which aren't only noise are part of the title.
+    (
+        "Lewis Capaldi - Someone You Loved (Acoustic)",
+        "Lewis Capaldi",
+        "Someone You Loved (Acoustic)",
+        "Lewis Capaldi",
+    ),
+    (
+        "Coldplay - Yellow (Live at Glastonbury 2016)",
+        "Coldplay",
+        "Yellow (Live at Glastonbury 2016)",
+        "Coldplay",
+    ),
+    (
+        "Post Malone, Swae Lee - Sunflower (Spider-Man: Into the Spider-Verse)",
+        "Post Malone",
+        "Sunflower (Spider-Man: Into the Spider-Verse)",
+        "Post Malone",
+    ),
+    (
+        "Queen – Bohemian Rhapsody (Official Video Remastered)",
+        "Queen Official",
+        "Bohemian Rhapsody (Official Video Remastered)",
+        "Queen",
+    ),
+    (
+        "Lofi hip hop radio - beats to relax/study to",
+        "Lofi Girl",
+        "Lofi hip hop radio - beats to relax/study to",
+        "Lofi Girl",
+    ),
+]
+
+
+@pytest.mark.parametrize(("title", "author", "expected_title", "expected_author"), CORPUS)
+def test_corpus(title: str, author: str, expected_title: str, expected_author: str) -> None:
+    assert clean_title(title, author) == expected_title
+    assert clean_author(author) == expected_author
+
+
+@pytest.mark.parametrize("title", ["(Official Video)", "[Lyrics]", "  "])
+def test_noise_only_titles_are_kept(title: str) -> None:
+    assert clean_title(title) == title
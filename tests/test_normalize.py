@@ -0,0 +1,29 @@
+import pytest
+
+from extensions.synthesize.shared.normalize import DEFAULT, PLAIN, Normalizer
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("idk lol", "i dont know lol"),
+        ("IDK", "i dont know"),
+        ("check https://example.com/a?b=1 out!", "check out"),
+        ("hi <:wave:123456> there", "hi there"),
+        ("what's up??", "whats up"),
+    ],
+)
+def test_normalize(text: str, expected: str) -> None:
+    assert DEFAULT.normalize(text) == expected
+
+
+@pytest.mark.parametrize("text", ["İdk", "ıdk", "İDK ok"])
+def test_unfoldable_slang_is_kept(text: str) -> None:
+    # IGNORECASE matches these against "idk" although their case folding differs.
+    assert DEFAULT.normalize(text) == PLAIN.normalize(text)
+
+
+def test_extend_overrides_defaults() -> None:
+    normalizer = DEFAULT.extend({"IDK": "no idea"})
+    assert normalizer.normalize("idk") == "no idea"
+    assert normalizer.normalize("brb") == DEFAULT.normalize("brb")
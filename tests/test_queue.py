@@ -0,0 +1,60 @@
+from extensions.music.player.queue import Queue, QueuedTrack, TrackList
+
+
+def track(index: int) -> QueuedTrack:
+    return QueuedTrack(
+        encoded=f"encoded-{index}",
+        identifier=str(index),
+        title=f"Track {index}",
+        author="Author",
+        uri=None,
+        length=1000,
+        source="youtube",
+        is_seekable=True,
+        is_stream=False,
+        requester_id=1,
+    )
+
+
+def test_put_keeps_chunks_bounded() -> None:
+    queue = Queue()
+    for index in range(TrackList.LOAD * 12):
+        queue.put(track(index))
+
+    chunks = queue._items._chunks
+    assert len(chunks) > 1
+    assert all(len(chunk) <= TrackList.LOAD * 2 for chunk in chunks)
+    assert len(queue) == TrackList.LOAD * 12
+    assert [item.identifier for item in queue[:3]] == ["0", "1", "2"]
+    assert queue.get().identifier == "0"
+    assert queue[TrackList.LOAD].identifier == str(TrackList.LOAD + 1)
+
+
+def test_requesters_of_restored_tracks_are_counted_lazily() -> None:
+    tracks = [track(index) for index in range(100)]
+    for index, item in enumerate(tracks):
+        item.requester_id = index % 4 + 1
+
+    queue = Queue()
+    queue.put_lazy(tracks)
+    assert queue.requesters == {1: 25, 2: 25, 3: 25, 4: 25}
+
+    queue.get()
+    queue.put(track(100))
+    del queue[0]
+    assert queue.requesters == {1: 25, 2: 24, 3: 25, 4: 25}
+
+    queue.shuffle()
+    assert queue.requesters == {1: 25, 2: 24, 3: 25, 4: 25}
+    assert queue.pending == 0
+
+
+def test_slicing_past_the_head_skips_whole_cursors() -> None:
+    queue = Queue()
+    queue.put_lazy([track(index) for index in range(100)], requester_id=2)
+    queue.put_lazy([track(index) for index in range(100, 200)])
+
+    assert [item.identifier for item in queue[150:153]] == ["150", "151", "152"]
+    assert [item.identifier for item in queue[95:105]] == [str(index) for index in range(95, 105)]
+    assert all(item.requester_id == 2 for item in queue[95:100])
+    assert queue.requesters == {2: 100, 1: 100}
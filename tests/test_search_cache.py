@@ -0,0 +1,37 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from asyncpg import InterfaceError, PostgresError
+
+from system.lavalink.search import SearchCache
+
+
+class Pool:
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+    async def fetchrow(self, *args: object) -> None:
+        raise self.error
+
+    async def execute(self, *args: object) -> None:
+        raise self.error
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        PostgresError("relation does not exist"),
+        InterfaceError("pool is closed"),
+        ConnectionResetError(),
+        asyncio.TimeoutError(),
+    ],
+)
+def test_unreachable_database_is_a_miss(error: BaseException) -> None:
+    async def main() -> None:
+        cache = SearchCache(SimpleNamespace(pool=Pool(error)))
+        key = ("never gonna give you up", "ytsearch")
+        assert await cache.fetch(key) is None
+        await cache.store(key, {"tracks": []})
+
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+import pytest
+
+from extensions.synthesize.shared.spam import (
+    SpamFilter,
+    has_excessive_repetition,
+    is_scrambled_text,
+    is_spam,
+)
+
+# Classifications of the implementation this one replaced, as
+# (is_spam, has_excessive_repetition, is_scrambled_text).
+CLASSIFICATIONS = [
+    ("", (False, False, False)),
+    ("ok", (False, False, False)),
+    ("hey", (False, False, False)),
+    ("good morning", (False, False, False)),
+    ("can you skip this song please", (False, False, False)),
+    ("nah bro that was crazy", (False, False, False)),
+    ("hello everyone how are you doing today", (False, False, True)),
+    ("the quick brown fox jumps over the lazy dog", (False, False, True)),
+    ("zxcvbnm zxcvbnm", (False, False, True)),
+    ("strengths", (False, False, True)),
+    ("rhythms", (False, False, False)),
+    ("lol lol lol lol lol", (True, True, False)),
+    ("spam spam spam spam spam spam", (True, True, False)),
+    ("aaaaaaaaaaaaa", (True, True, True)),
+    ("heyyyy guys", (True, True, False)),
+    ("asdfghjkl qwertyuiop", (True, True, True)),
+    ("a b c d e f", (True, True, False)),
+    ("this is supercalifragilisticexpialidocious", (True, True, True)),
+    ("bbbbbbbb cccccccc dddddddd", (True, True, True)),
+    ("xkcd xkcd xkcd", (True, False, True)),
+    ("hi hi hi", (True, False, True)),
+]
+
+
+@pytest.mark.parametrize(("text", "expected"), CLASSIFICATIONS)
+def test_classification(text: str, expected: tuple) -> None:
+    assert (
+        is_spam(text),
+        has_excessive_repetition(text),
+        is_scrambled_text(text),
+    ) == expected
+
+
+def test_filter_flags_repeated_messages() -> None:
+    spam = SpamFilter()
+    message = "can you skip this song please"
+    assert [spam.check(1, message) for _ in range(3)] == [False, False, True]
+
+    # Every user has their own window.
+    assert not spam.check(2, message)
+
+
+def test_filter_flags_a_dominant_word() -> None:
+    spam = SpamFilter()
+    messages = [
+        "bruh okay bruh fine",
+        "bruh come bruh on",
+        "bruh why bruh now",
+        "bruh stop bruh it",
+        "bruh just bruh go",
+    ]
+    assert [spam.check(1, message) for message in messages] == [
+        False,
+        False,
+        False,
+        False,
+        True,
+    ]
+
+
+def test_filter_allows_varied_messages() -> None:
+    spam = SpamFilter()
+    messages = [
+        "can you skip this song please",
+        "good morning everyone",
+        "nah bro that was crazy",
+        "who queued this one",
+        "turn it up a little",
+        "ok one more round then",
+        "that was a good game",
+    ]
+    assert not any(spam.check(1, message) for message in messages)
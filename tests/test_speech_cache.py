@@ -0,0 +1,59 @@
+import asyncio
+from typing import Callable, List, Optional
+
+from extensions.synthesize.shared.cache import SpeechCache
+from extensions.synthesize.shared.engines import Engine
+
+
+class Media:
+    def __init__(self) -> None:
+        self.lookups: List[Callable[[str], Optional[bytes]]] = []
+
+    def register(self, lookup: Callable[[str], Optional[bytes]]) -> None:
+        self.lookups.append(lookup)
+
+    def unregister(self, lookup: Callable[[str], Optional[bytes]]) -> None:
+        self.lookups.remove(lookup)
+
+    def __contains__(self, name: str) -> bool:
+        return False
+
+    async def put(self, data: bytes, suffix: str, *, digest: str) -> str:
+        return f"{digest}{suffix}"
+
+
+class SlowEngine(Engine):
+    name = "slow"
+    suffix = ".mp3"
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def synthesize(self, text: str, language: str, accent: str) -> bytes:
+        self.calls += 1
+        await self.release.wait()
+        return b"audio"
+
+
+def test_cancelled_fetch_leaves_other_waiters() -> None:
+    async def main() -> None:
+        cache = SpeechCache(Media())  # type: ignore
+        engine = SlowEngine()
+        first = asyncio.create_task(cache.fetch(engine, "hello", "en", "us"))
+        second = asyncio.create_task(cache.fetch(engine, "hello", "en", "us"))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.sleep(0)
+        engine.release.set()
+
+        name = await second
+        assert first.cancelled()
+        assert name.endswith(".mp3")
+        assert engine.calls == 1
+        assert cache.lookup(name) == b"audio"
+        assert not cache.pending
+        await asyncio.gather(*cache.writes)
+
+    asyncio.run(main())
@@ -9,7 +9,9 @@ from typing import List, Optional, cast
 from datetime import datetime
 
 from discord import (
+    Guild,
     Interaction,
+    Member,
     Message,
     AllowedMentions,
     Intents,
@@ -17,6 +19,7 @@ from discord import (
     TextChannel,
     VoiceChannel,
     Forbidden,
+    VoiceState,
 )
 from discord.ext.commands import (
     AutoShardedBot,
@@ -44,9 +47,14 @@ from discord.ext.commands import (
     CommandOnCooldown,
 )
 from aiohttp import ClientSession
-from wavelink import Node, Pool
+from wavelink import Node
 
 from system.base import Help, Context
+from system.lavalink import select_node
+from system.lavalink.search import SearchCache
+from system.media import MediaStore
+from system.guilds import GuildIndex
+from system.voice import VoiceRegistry
 
 from cashews import cache
 
@@ -56,6 +64,10 @@ cache.setup("mem://")
 class Wock(AutoShardedBot):
     pool: asyncpg.Pool
     session: ClientSession
+    search_cache: SearchCache
+    media: MediaStore
+    voice: VoiceRegistry
+    guild_index: GuildIndex
 
     def __init__(self) -> None:
         super().__init__(
@@ -77,10 +89,14 @@ class Wock(AutoShardedBot):
             ),
             owner_ids=[474206995214368779, 1300970029730234418, 345462882902867969],
         )
+        self.search_cache = SearchCache(self)
+        self.media = MediaStore(self)
+        self.voice = VoiceRegistry(self)
+        self.guild_index = GuildIndex(self)
 
     @property
     def node(self) -> Node:
-        return Pool.get_node()
+        return select_node()
 
     async def load_cogs_from_dir(self, base_dir: str):
         for entry in os.scandir(base_dir):
@@ -96,10 +112,15 @@ class Wock(AutoShardedBot):
 
     async def setup_hook(self) -> None:
         self.session = ClientSession()
+        await self.media.start()
         self.tree.interaction_check = self.blacklist_check
         await self.load_extension("jishaku")
         await self.load_cogs_from_dir("extensions")
 
+    async def close(self) -> None:
+        await self.media.close()
+        await super().close()
+
     async def is_blacklisted(self, target_ids: List[int]) -> bool:
         query = """
         SELECT EXISTS(
@@ -123,6 +144,26 @@ class Wock(AutoShardedBot):
 
     async def on_ready(self) -> None:
         logging.info("wock is now online")
+        self.voice.rebuild()
+        self.guild_index.rebuild()
+
+    async def on_guild_join(self, guild: Guild) -> None:
+        self.guild_index.add(guild)
+
+    async def on_guild_remove(self, guild: Guild) -> None:
+        self.guild_index.discard(guild.id)
+
+    async def on_guild_update(self, before: Guild, after: Guild) -> None:
+        if (before.name, before.owner_id) != (after.name, after.owner_id):
+            self.guild_index.add(after)
+
+    async def on_voice_state_update(
+        self,
+        member: Member,
+        before: VoiceState,
+        after: VoiceState,
+    ) -> None:
+        self.voice.update(member, before, after)
 
     async def get_context(self, message: Message, *, cls=Context):
         return await super().get_context(message, cls=cls)